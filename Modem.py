@@ -1,13 +1,327 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
 import seaborn as sns
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice, repeat, zip_longest
+import asyncio
+import collections
+import contextlib
+import copy
+import hashlib
+import inspect
+import io
+import json
+import os
+import re
+import time
+import tracemalloc
+import unicodedata
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from scipy.optimize import differential_evolution
+from scipy.signal import lfilter
+from scipy.stats import norm
+from sklearn.linear_model import Ridge
+from statsmodels.tsa.exponential_smoothing.ets import ETSModel
 import warnings
 warnings.filterwarnings('ignore')
 
+# Ordre des colonnes du jeu de données (et de l'axe métrique de l'ensemble)
+METRIQUES = [
+    'Adherents', 'Comites_Locaux', 'Elus_Locaux', 'Elus_Nationaux', 'Elus_Europeens',
+    'Revenus_Total', 'Cotisations_Adherents', 'Dons_Prives', 'Financement_Public',
+    'Revenus_Evenements', 'Revenus_Formations', 'Financement_Europeen',
+    'Depenses_Total', 'Depenses_Personnel', 'Depenses_Campagnes', 'Depenses_Communication',
+    'Depenses_Fonctionnement', 'Depenses_Formation', 'Depenses_Europeennes',
+    'Taux_Execution_Budget', 'Ratio_Cotisations_Revenus', 'Dependance_Financement_Public',
+    'Solde_Financier', 'Reserves_Financieres',
+    'Investissement_Communication', 'Investissement_Numérique', 'Investissement_Formation',
+    'Investissement_Europe', 'Investissement_Prospective',
+]
+
+# Postes composant les totaux en mode comptable
+COMPOSANTES_REVENUS = ['Cotisations_Adherents', 'Dons_Prives', 'Financement_Public',
+                       'Revenus_Evenements', 'Revenus_Formations', 'Financement_Europeen']
+COMPOSANTES_DEPENSES = ['Depenses_Personnel', 'Depenses_Campagnes', 'Depenses_Communication',
+                        'Depenses_Fonctionnement', 'Depenses_Formation', 'Depenses_Europeennes']
+# Séries recalculées à partir des postes en mode comptable
+SERIES_COMPTABLES = ['Revenus_Total', 'Depenses_Total', 'Solde_Financier', 'Reserves_Financieres',
+                     'Taux_Execution_Budget', 'Ratio_Cotisations_Revenus', 'Dependance_Financement_Public']
+
+# Longueur minimale de la dernière plage d'années renseignées pour un ajustement ETS
+HISTORIQUE_MIN_ETS = 6
+
+# Nombre d'ensembles dont les prévisions restent en cache (les plus anciens sont évincés)
+TAILLE_CACHE_PREVISIONS = 8
+
+def _fit_ets_chunk(series, horizon, alpha):
+    """Ajuste un modèle ETS amorti sur chaque colonne et renvoie prévisions et intervalles
+    
+    Chaque colonne est ajustée sur sa dernière plage d'années renseignées (historiques
+    observés lacunaires) ; les colonnes trop courtes ou vides donnent des NaN.
+    """
+    n_obs, n_series = series.shape
+    mean = np.full((horizon, n_series), np.nan)
+    lower = np.full((horizon, n_series), np.nan)
+    upper = np.full((horizon, n_series), np.nan)
+    
+    for j in range(n_series):
+        finite = np.isfinite(series[:, j])
+        if not finite.any():
+            continue
+        last = np.flatnonzero(finite)[-1]
+        missing = np.flatnonzero(~finite[:last + 1])
+        first = missing[-1] + 1 if len(missing) else 0
+        history = series[first:last + 1, j]
+        if len(history) < HISTORIQUE_MIN_ETS:
+            continue
+        # Années manquantes en fin d'historique : la prévision démarre d'autant plus loin
+        gap = n_obs - 1 - last
+        
+        if np.ptp(history) == 0:
+            # Série constante : persistance de la dernière valeur
+            mean[:, j] = lower[:, j] = upper[:, j] = history[-1]
+            continue
+        
+        fit = ETSModel(pd.Series(history), error='add', trend='add',
+                       damped_trend=True).fit(disp=False)
+        start = len(history) + gap
+        frame = fit.get_prediction(start=start, end=start + horizon - 1).summary_frame(alpha=alpha)
+        mean[:, j] = frame['mean']
+        lower[:, j] = frame['pi_lower']
+        upper[:, j] = frame['pi_upper']
+    
+    return mean, lower, upper
+
+# Typage des colonnes pour l'export Excel
+COLONNES_EFFECTIFS = ['Adherents', 'Comites_Locaux', 'Elus_Locaux', 'Elus_Nationaux', 'Elus_Europeens']
+COLONNES_TAUX = ['Taux_Execution_Budget', 'Ratio_Cotisations_Revenus',
+                 'Dependance_Financement_Public', 'Solde_Financier']
+FORMAT_EFFECTIF = '#,##0'
+FORMAT_MONTANT = '#,##0.000'  # millions d'euros
+FORMAT_TAUX = '0.0%'
+EXCEL_MAX_LIGNES = 1048576
+
+# Libellés et unités des statistiques d'insights
+LIBELLES_INSIGHTS = {
+    'revenus_moyens': ("Revenus moyens annuels", "M€"),
+    'depenses_moyennes': ("Dépenses moyennes annuelles", "M€"),
+    'adherents_moyens': ("Adhérents moyens", "personnes"),
+    'taux_execution_moyen': ("Taux d'exécution budgétaire moyen", "%"),
+    'evolution_revenus': ("Évolution des revenus", "%"),
+    'evolution_adherents': ("Évolution des adhérents", "%"),
+    'part_cotisations': ("Part des cotisations dans les revenus", "%"),
+    'part_dons': ("Part des dons privés", "%"),
+    'part_financement_public': ("Part du financement public", "%"),
+    'part_financement_europeen': ("Part du financement européen", "%"),
+    'solde_moyen': ("Solde financier moyen", "% du budget"),
+    'reserves_finales': ("Réserves financières finales", "M€"),
+    'dependance_financement_public': ("Dépendance au financement public", "%"),
+}
+
+# Indicateurs dérivés des flux : nom -> (postes au numérateur, postes au dénominateur,
+# facteur, libellé, unité). Les montants sont en M€, d'où le facteur 1e6 pour les ratios en €.
+INDICATEURS_DERIVES = {
+    'Taux_Execution_Budget': (['Depenses_Total'], ['Revenus_Total'], 1.0,
+                              "Taux d'exécution budgétaire", "%"),
+    'Ratio_Cotisations_Revenus': (['Cotisations_Adherents'], ['Revenus_Total'], 1.0,
+                                  "Part des cotisations dans les revenus", "%"),
+    'Dependance_Financement_Public': (['Financement_Public'], ['Revenus_Total'], 1.0,
+                                      "Dépendance au financement public", "%"),
+    'Part_Dons_Revenus': (['Dons_Prives'], ['Revenus_Total'], 1.0, "Part des dons privés", "%"),
+    'Part_Campagnes_Depenses': (['Depenses_Campagnes'], ['Depenses_Total'], 1.0,
+                                "Part des campagnes dans les dépenses", "%"),
+    'Cout_Par_Adherent': (['Depenses_Total'], ['Adherents'], 1e6, "Coût par adhérent", "€"),
+    'Revenus_Par_Adherent': (['Revenus_Total'], ['Adherents'], 1e6, "Revenus par adhérent", "€"),
+    'Financement_Par_Elu': (['Financement_Public'], ['Elus_Locaux', 'Elus_Nationaux', 'Elus_Europeens'],
+                            1e6, "Financement public par élu", "€"),
+}
+
+# Indicateurs génériques, applicables à toute métrique ou indicateur ci-dessus :
+# Croissance_<nom> (glissement annuel) et Moyenne5_<nom> (moyenne mobile sur 5 ans)
+PREFIXE_CROISSANCE = 'Croissance_'
+PREFIXE_MOYENNE_MOBILE = 'Moyenne5_'
+FENETRE_MOYENNE_MOBILE = 5
+
+# Version du format des comptes mis en cache (à incrémenter si le chargement change)
+VERSION_CACHE_COMPTES = 2
+
+# Correspondance entre intitulés des comptes publiés (normalisés) et colonnes du modèle ;
+# les colonnes du modèle elles-mêmes sont reconnues automatiquement
+CORRESPONDANCE_COMPTES = {
+    'exercice': 'Annee',
+    'annee': 'Annee',
+    'parti': 'Parti',
+    'formation politique': 'Parti',
+    'nombre d adherents': 'Adherents',
+    'cotisations des adherents': 'Cotisations_Adherents',
+    'dons de personnes physiques': 'Dons_Prives',
+    'dons des personnes physiques': 'Dons_Prives',
+    'aide publique': 'Financement_Public',
+    'aide publique 1re fraction': 'Financement_Public',
+    'aide publique 2e fraction': 'Financement_Public',
+    'manifestations et colloques': 'Revenus_Evenements',
+    'produits des manifestations': 'Revenus_Evenements',
+    'produits de formation': 'Revenus_Formations',
+    'subventions europeennes': 'Financement_Europeen',
+    'total des produits': 'Revenus_Total',
+    'frais de personnel': 'Depenses_Personnel',
+    'salaires et charges sociales': 'Depenses_Personnel',
+    'depenses electorales': 'Depenses_Campagnes',
+    'aides aux candidats': 'Depenses_Campagnes',
+    'propagande et communication': 'Depenses_Communication',
+    'achats et charges externes': 'Depenses_Fonctionnement',
+    'frais de formation': 'Depenses_Formation',
+    'total des charges': 'Depenses_Total',
+    # Résultat publié en euros : converti en part des revenus (Solde_Financier) au chargement
+    'resultat de l exercice': 'Resultat_Exercice',
+    'fonds propres': 'Reserves_Financieres',
+}
+
+# Profil de paramètres par série (taux de croissance, multiplicateurs, écart-type du bruit).
+# Chaque série accepte aussi un facteur 'echelle' (1 par défaut) ajusté par la calibration.
+PROFIL_DEFAUT = {
+    'Adherents': {'taux': [0.35, -0.08, 0.05, 0.15, 0.03], 'bruit': 0.09},
+    'Comites_Locaux': {'taux': [0.20, 0.05, 0.10, 0.03], 'bruit': 0.0},
+    'Elus_Locaux': {'municipales': [1.8, 1.4, 1.6], 'taux': [0.08, 0.12, 0.06], 'bruit': 0.07},
+    'Elus_Nationaux': {'legislatives': [3.0, 1.5, 4.5, 3.8], 'croissance': 0.08, 'bruit': 0.12},
+    'Elus_Europeens': {'sieges': [0, 6, 4, 6], 'bruit': 0.0},
+    'Revenus_Total': {'taux': [0.25, -0.10, 0.08, 0.20, 0.05], 'bruit': 0.10},
+    'Cotisations_Adherents': {'part': 0.25, 'taux': [0.15, 0.02, 0.10, 0.04], 'bruit': 0.08},
+    'Dons_Prives': {'part': 0.30, 'alliances': [1.1, 0.9, 1.3, 1.1], 'cycle': [1.7, 1.0, 1.0, 1.0, 1.0],
+                    'croissance': 0.04, 'bruit': 0.14},
+    'Financement_Public': {'part': 0.25, 'resultats': [0.6, 0.8, 1.2, 1.6], 'croissance': 0.06, 'bruit': 0.09},
+    'Revenus_Evenements': {'part': 0.08, 'cycle': [1.8, 1.0, 1.0, 1.0, 1.0], 'croissance': 0.05, 'bruit': 0.12},
+    'Revenus_Formations': {'part': 0.05, 'croissance': 0.07, 'bruit': 0.10},
+    'Financement_Europeen': {'part': 0.07, 'mandats': [0.5, 1.5], 'croissance': 0.04, 'bruit': 0.15},
+    'Depenses_Total': {'part': 0.92, 'cycle': [1.5, 1.0, 1.0, 1.0, 1.0], 'croissance': 0.05, 'bruit': 0.08},
+    'Depenses_Personnel': {'part': 0.30, 'taux': [0.10, 0.05, 0.08], 'bruit': 0.06},
+    'Depenses_Campagnes': {'part': 0.25, 'cycle': [2.2, 0.6, 0.6, 0.6, 1.4], 'croissance': 0.04, 'bruit': 0.18},
+    'Depenses_Communication': {'part': 0.15, 'croissance': 0.08, 'bruit': 0.11},
+    'Depenses_Fonctionnement': {'part': 0.12, 'croissance': 0.03, 'bruit': 0.05},
+    'Depenses_Formation': {'part': 0.06, 'croissance': 0.06, 'bruit': 0.09},
+    'Depenses_Europeennes': {'part': 0.04, 'croissance': 0.05, 'bruit': 0.13},
+    'Taux_Execution_Budget': {'niveaux': [0.82, 0.85, 0.88], 'bruit': 0.04},
+    'Ratio_Cotisations_Revenus': {'niveaux': [0.28, 0.25, 0.22], 'bruit': 0.05},
+    'Dependance_Financement_Public': {'niveaux': [0.20, 0.28, 0.35], 'bruit': 0.06},
+    'Solde_Financier': {'cycle': [-0.08, 0.04, 0.02, 0.02, 0.02], 'bruit': 0.09},
+    'Reserves_Financieres': {'cycle': [-0.15, 0.10, 0.03, 0.03, 0.03], 'bruit': 0.08},
+    'Investissement_Communication': {'part': 0.09, 'croissance': 0.10, 'bruit': 0.14},
+    'Investissement_Numérique': {'part': 0.07, 'croissance': 0.15, 'bruit': 0.17},
+    'Investissement_Formation': {'part': 0.05, 'croissance': 0.08, 'bruit': 0.12},
+    'Investissement_Europe': {'part': 0.04, 'croissance': 0.06, 'bruit': 0.16},
+    'Investissement_Prospective': {'part': 0.03, 'croissance': 0.05, 'bruit': 0.18},
+}
+
+# Paramètres non ajustés par l'optimiseur (niveau absorbé par 'echelle', bruit estimé à part)
+PARAMETRES_FIXES = {'part', 'bruit', 'echelle', 'sieges'}
+
+# Modèle de bruit corrélé : corrélations des innovations entre séries (Cholesky)
+# et persistance AR(1) d'une année sur l'autre, à variance marginale inchangée
+BRUIT_CORRELE = {
+    'correlations': {
+        ('Dons_Prives', 'Revenus_Evenements'): 0.6,
+        ('Dons_Prives', 'Depenses_Campagnes'): 0.5,
+        ('Revenus_Evenements', 'Depenses_Campagnes'): 0.5,
+        ('Depenses_Campagnes', 'Depenses_Communication'): 0.4,
+        ('Adherents', 'Cotisations_Adherents'): 0.7,
+        ('Elus_Nationaux', 'Financement_Public'): 0.5,
+        ('Elus_Locaux', 'Financement_Public'): 0.3,
+        ('Revenus_Total', 'Depenses_Total'): 0.6,
+    },
+    'persistance': {
+        'Adherents': 0.7,
+        'Cotisations_Adherents': 0.6,
+        'Elus_Locaux': 0.5,
+        'Financement_Public': 0.6,
+        'Dons_Prives': 0.3,
+        'Depenses_Personnel': 0.8,
+        'Depenses_Fonctionnement': 0.7,
+        'Reserves_Financieres': 0.8,
+    },
+}
+
+# Événements propres au MoDem : (métrique, première année, dernière année, opération, valeur)
+TENDANCES_PARTI = [
+    # Création du MoDem (2007)
+    ('Revenus_Total', 2007, 2007, 'facteur', 1.6),
+    ('Adherents', 2007, 2007, 'facteur', 2.2),
+    # Élection présidentielle 2007 (score de Bayrou)
+    ('Dons_Prives', 2007, 2007, 'facteur', 2.5),
+    ('Depenses_Campagnes', 2007, 2007, 'facteur', 2.8),
+    # Européennes 2009
+    ('Elus_Europeens', 2009, 2009, 'valeur', 6),
+    ('Financement_Europeen', 2009, 2009, 'facteur', 1.8),
+    # Alliance avec le PS (2012)
+    ('Financement_Public', 2012, 2012, 'facteur', 1.4),
+    ('Elus_Nationaux', 2012, 2012, 'facteur', 1.6),
+    # Participation au gouvernement (2012-2016)
+    ('Revenus_Total', 2012, 2016, 'facteur', 1.15),
+    ('Depenses_Personnel', 2012, 2016, 'facteur', 1.10),
+    # Alliance avec LREM (2017)
+    ('Revenus_Total', 2017, 2017, 'facteur', 1.4),
+    ('Financement_Public', 2017, 2017, 'facteur', 1.6),
+    ('Elus_Nationaux', 2017, 2017, 'facteur', 4.5),
+    ('Adherents', 2017, 2017, 'facteur', 1.2),
+    # Européennes 2019
+    ('Elus_Europeens', 2019, 2019, 'valeur', 6),
+    ('Investissement_Europe', 2019, 2019, 'facteur', 1.5),
+    # Réélection 2022
+    ('Depenses_Campagnes', 2022, 2022, 'facteur', 1.8),
+    ('Dons_Prives', 2022, 2022, 'facteur', 1.4),
+]
+
+# Étapes du mode de profilage mémoire, dans l'ordre d'exécution ('export' est aussi
+# disponible, mais tracemalloc ralentit fortement openpyxl et ses petites allocations)
+ETAPES_PROFILAGE = ['generation', 'indicateurs', 'tresorerie', 'conversion', 'insights']
+
+# Tableaux des agrégats matérialisés (fusionnables) sauvegardés avec leur recette
+CLES_AGREGATS = ('annees', 'moyenne', 'm2', 'minimum', 'maximum', 'evolution')
+
+# Séries indexées par défaut pour les requêtes sur scénarios (toutes les années)
+METRIQUES_INDEXEES = ['Reserves_Financieres', 'Solde_Financier', 'Dependance_Financement_Public',
+                      'Revenus_Total', 'Depenses_Total']
+
+# Prédicat textuel : Metrique[annee] opérateur valeur
+MOTIF_PREDICAT = re.compile(r'^\s*(\w+)\[(\d{4})\]\s*(<=|>=|==|<|>)\s*([-+0-9.eE]+)\s*$')
+
+# Types de scrutin (drapeaux combinables : 2014 cumule municipales et européennes)
+ELECTION_PRESIDENTIELLE = 1  # Présidentielle et législatives
+ELECTION_MUNICIPALES = 2
+ELECTION_EUROPEENNES = 4
+
+# Régimes politiques : lancement (2007-2008), consolidation (2009-2011), alliance PS
+# (2012-2016), alliance LREM (2017-2022), après 2023 — première année de chaque régime
+BORNES_REGIMES = [2009, 2012, 2017, 2023]
+
+# Calendrier de trésorerie : répartition trimestrielle (T1..T4) de chaque flux annuel.
+# Les dépenses de campagne se concentrent dans les mois précédant le scrutin.
+PROFILS_TRESORERIE = {
+    'Cotisations_Adherents': [0.40, 0.20, 0.15, 0.25],
+    'Dons_Prives': [0.20, 0.20, 0.15, 0.45],  # pic de fin d'année (réduction d'impôt)
+    'Financement_Public': [0.0, 1.0, 0.0, 0.0],  # versement annuel unique de l'aide publique
+    'Revenus_Evenements': [0.15, 0.25, 0.35, 0.25],  # universités d'été à la rentrée
+    'Revenus_Formations': [0.25, 0.25, 0.20, 0.30],
+    'Financement_Europeen': [0.50, 0.0, 0.0, 0.50],
+    'Depenses_Personnel': [0.25, 0.25, 0.25, 0.25],
+    'Depenses_Campagnes': [0.25, 0.25, 0.25, 0.25],  # hors année électorale
+    'Depenses_Communication': [0.20, 0.25, 0.30, 0.25],
+    'Depenses_Fonctionnement': [0.25, 0.25, 0.25, 0.25],
+    'Depenses_Formation': [0.20, 0.25, 0.30, 0.25],
+    'Depenses_Europeennes': [0.25, 0.25, 0.25, 0.25],
+}
+PROFILS_CAMPAGNE = {
+    ELECTION_PRESIDENTIELLE: [0.35, 0.55, 0.05, 0.05],  # avril-juin
+    ELECTION_MUNICIPALES: [0.60, 0.20, 0.10, 0.10],  # mars
+    ELECTION_EUROPEENNES: [0.25, 0.60, 0.10, 0.05],  # mai-juin
+}
+
 class ModemFinanceAnalyzer:
-    def __init__(self):
+    def __init__(self, n_scenarios=1, seed=None, ledger=False, profile=None, noise_model=None):
         self.parti = "Mouvement Démocrate (MoDem)"
         self.colors = ['#FF9900', '#FFCC00', '#FF6600', '#CC9900', '#FF9933', 
                       '#CC6600', '#FFCC33', '#FF9966', '#CC9933', '#FFCC66']
@@ -17,6 +331,26 @@ class ModemFinanceAnalyzer:
         self.creation_year = 2007
         self.udi_creation = 2012  # Création de l'UDI (concurrent)
         
+        # Simulation d'ensemble : chaque série est un tableau (scénarios, années)
+        self.n_scenarios = n_scenarios
+        self.rng = np.random.default_rng(seed)
+        
+        # Mode comptable : totaux = somme des postes, solde = revenus - dépenses,
+        # réserves = réserves initiales + cumul des soldes
+        self.ledger = ledger
+        
+        # Modèle de bruit : indépendant (None), corrélé et persistant ('correle' ou dict
+        # {'correlations': {(série, série): rho}, 'persistance': {série: phi}})
+        self.noise_model = BRUIT_CORRELE if noise_model == 'correle' else noise_model
+        
+        # Paramètres des séries : profil par défaut ou profil calibré (dict ou fichier JSON)
+        self.profile = copy.deepcopy(PROFIL_DEFAUT)
+        if profile is not None:
+            self.load_profile(profile)
+        
+        # Prévisions déjà calculées, indexées par empreinte de l'ensemble et des options
+        self._forecast_cache = collections.OrderedDict()
+        
         # Configuration spécifique au MoDem
         self.config = {
             "type": "parti_politique",
@@ -24,6 +358,7 @@ class ModemFinanceAnalyzer:
             "electorat_cible": ["cadres", "enseignants", "fonctionnaires", "classes_moyennes_supérieures"],
             "budget_base": 6,  # millions d'euros (parti de taille moyenne)
             "adherents_base": 30000,
+            "reserves_base": 2.4,  # millions d'euros (40% du budget de base)
             "importance": "pivot",
             "sources_financement": ["cotisations", "dons", "financement_public", "evenements", "formations"]
         }
@@ -32,755 +367,2253 @@ class ModemFinanceAnalyzer:
         """Génère des données financières pour le MoDem"""
         print(f"🏛️ Génération des données financières pour {self.parti}...")
         
-        # Créer une base de données annuelle
-        dates = pd.date_range(start=f'{self.start_year}-01-01', 
-                             end=f'{self.end_year}-12-31', freq='Y')
-        
-        data = {'Annee': [date.year for date in dates]}
-        
-        # Données d'adhérents et structure
-        data['Adherents'] = self._simulate_adherents(dates)
-        data['Comites_Locaux'] = self._simulate_comites_locaux(dates)
-        data['Elus_Locaux'] = self._simulate_elus_locaux(dates)
-        data['Elus_Nationaux'] = self._simulate_elus_nationaux(dates)
-        data['Elus_Europeens'] = self._simulate_elus_europeens(dates)
-        
-        # Revenus du parti
-        data['Revenus_Total'] = self._simulate_total_revenue(dates)
-        data['Cotisations_Adherents'] = self._simulate_membership_fees(dates)
-        data['Dons_Prives'] = self._simulate_private_donations(dates)
-        data['Financement_Public'] = self._simulate_public_funding(dates)
-        data['Revenus_Evenements'] = self._simulate_event_revenue(dates)
-        data['Revenus_Formations'] = self._simulate_training_revenue(dates)
-        data['Financement_Europeen'] = self._simulate_european_funding(dates)
-        
-        # Dépenses du parti
-        data['Depenses_Total'] = self._simulate_total_expenses(dates)
-        data['Depenses_Personnel'] = self._simulate_staff_expenses(dates)
-        data['Depenses_Campagnes'] = self._simulate_campaign_expenses(dates)
-        data['Depenses_Communication'] = self._simulate_communication_expenses(dates)
-        data['Depenses_Fonctionnement'] = self._simulate_operating_expenses(dates)
-        data['Depenses_Formation'] = self._simulate_training_expenses(dates)
-        data['Depenses_Europeennes'] = self._simulate_european_expenses(dates)
-        
-        # Indicateurs financiers
-        data['Taux_Execution_Budget'] = self._simulate_budget_execution_rate(dates)
-        data['Ratio_Cotisations_Revenus'] = self._simulate_membership_ratio(dates)
-        data['Dependance_Financement_Public'] = self._simulate_public_funding_dependency(dates)
-        data['Solde_Financier'] = self._simulate_financial_balance(dates)
-        data['Reserves_Financieres'] = self._simulate_financial_reserves(dates)
-        
-        # Investissements stratégiques
-        data['Investissement_Communication'] = self._simulate_communication_investment(dates)
-        data['Investissement_Numérique'] = self._simulate_digital_investment(dates)
-        data['Investissement_Formation'] = self._simulate_training_investment(dates)
-        data['Investissement_Europe'] = self._simulate_european_investment(dates)
-        data['Investissement_Prospective'] = self._simulate_prospective_investment(dates)
-        
-        df = pd.DataFrame(data)
+        ensemble = self.generate_ensemble()
+        return self.ensemble_to_frame(ensemble)
+    
+    def generate_ensemble(self, n_scenarios=None, tilt=None, metrics=None):
+        """Génère l'ensemble des scénarios sous forme de tableau (scénarios, années, métriques)
+        
+        tilt : décalage de moyenne {métrique: décalage par année} des innovations
+        gaussiennes (échantillonnage préférentiel) ; les poids de vraisemblance sont
+        renvoyés dans 'log_poids' et les innovations décalées dans 'innovations'.
+        
+        metrics : sous-ensemble de métriques à simuler, identiques (à graine égale) à
+        celles d'un ensemble complet ; chaque série a son propre flux aléatoire.
+        """
+        if n_scenarios is not None:
+            self.n_scenarios = n_scenarios
+        tilt = tilt or {}
+        metrics = [m for m in METRIQUES if metrics is None or m in metrics]
+        
+        # Séries nécessaires : en mode comptable, postes et séries recalculées vont ensemble
+        required = set(metrics)
+        if self.ledger and required & set(COMPOSANTES_REVENUS + COMPOSANTES_DEPENSES + SERIES_COMPTABLES):
+            required |= set(COMPOSANTES_REVENUS + COMPOSANTES_DEPENSES + SERIES_COMPTABLES)
+        
+        # Index calendaire précalculé, partagé par toutes les séries
+        calendar = self._build_calendar(np.arange(self.start_year, self.end_year + 1))
+        
+        expected = {}
+        for metric, simulate in self._simulators().items():
+            if metric in required:
+                params = self.profile[metric]
+                expected[metric] = params.get('echelle', 1.0) * simulate(calendar, params)
+        if self.ledger and 'Revenus_Total' in expected:
+            self._anchor_ledger(expected, calendar)
+        
+        # Un flux par série (clé : rang dans METRIQUES), dérivé d'un seul tirage du
+        # générateur : une série se simule seule sans décaler les tirages des autres
+        entropy = self.rng.integers(2 ** 32, size=4, dtype=np.uint32).tolist()
+        streams = {metric: np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(j,)))
+                   for j, metric in enumerate(METRIQUES)}
+        
+        # Innovations N(0, 1) des séries bruitées (séries déterministes si bruit nul) ;
+        # le bruit corrélé mêle les innovations de toutes les séries bruitées
+        noisy = [m for m in METRIQUES if self.profile[m]['bruit'] > 0
+                 and (self.noise_model or m in required or m in tilt)]
+        innovations = np.zeros((self.n_scenarios, len(calendar['annees']), len(noisy)))
+        for k, metric in enumerate(noisy):
+            innovations[..., k] = self._innovations(calendar, streams[metric])
+        
+        log_weights = np.zeros(self.n_scenarios)
+        tilted_innovations = {}
+        for k, metric in enumerate(noisy):
+            if metric in tilt:
+                # Tirage sous N(décalage, 1), pondéré par le rapport N(0, 1) / N(décalage, 1)
+                shift = tilt[metric]
+                innovations[..., k] += shift
+                log_weights += (shift ** 2 / 2 - shift * innovations[..., k]).sum(axis=-1)
+                tilted_innovations[metric] = innovations[..., k]
+        
+        if self.noise_model:
+            innovations = self._correlated_noise(innovations, noisy)
+        
+        data = {}
+        for metric, path in expected.items():
+            if metric in noisy:
+                noise = 1 + self.profile[metric]['bruit'] * innovations[..., noisy.index(metric)]
+                data[metric] = path * noise
+            else:
+                data[metric] = self._broadcast(path)
         
         # Ajouter des tendances spécifiques au MoDem
-        self._add_party_trends(df)
+        self._add_party_trends(data, calendar)
+        
+        # Les séries indépendantes sont tirées dans tous les cas pour que les
+        # innovations des postes soient identiques (à graine égale) entre les deux modes
+        if self.ledger and 'Revenus_Total' in data:
+            self._apply_ledger(data)
+        
+        return {
+            'annees': calendar['annees'],
+            'metriques': metrics,
+            'valeurs': np.stack([data[m] for m in metrics], axis=-1),
+            'log_poids': log_weights,
+            'innovations': tilted_innovations,
+        }
+    
+    def ensemble_to_frame(self, ensemble):
+        """Convertit un ensemble en DataFrame (une ligne par scénario et par année)"""
+        values = ensemble['valeurs']
+        n_scenarios, n_years, n_metrics = values.shape
+        
+        df = pd.DataFrame(values.reshape(-1, n_metrics), columns=ensemble['metriques'])
+        df.insert(0, 'Annee', np.tile(ensemble['annees'], n_scenarios))
+        if n_scenarios > 1:
+            df.insert(0, 'Scenario', np.repeat(np.arange(n_scenarios), n_years))
         
         return df
     
-    def _simulate_adherents(self, dates):
+    def frame_to_ensemble(self, df):
+        """Convertit un DataFrame (avec ou sans colonne Scenario) en ensemble"""
+        if 'Scenario' in df.columns:
+            df = df.sort_values(['Scenario', 'Annee'])
+            n_scenarios = df['Scenario'].nunique()
+        else:
+            df = df.sort_values('Annee')
+            n_scenarios = 1
+        
+        metrics = [c for c in df.columns if c not in ('Scenario', 'Annee')]
+        years = df['Annee'].to_numpy()[:len(df) // n_scenarios]
+        values = df[metrics].to_numpy(dtype=float).reshape(n_scenarios, len(years), len(metrics))
+        
+        return {
+            'annees': years,
+            'metriques': metrics,
+            'valeurs': values,
+            'log_poids': np.zeros(n_scenarios),
+            'innovations': {},
+        }
+    
+    def _build_calendar(self, years):
+        """Construit l'index calendaire : type d'élection, phase du cycle et régime par année"""
+        years = np.asarray(years)
+        
+        # Scrutins récurrents, extrapolés au-delà de 2025 (2027 présidentielle, 2029 européennes...)
+        presidentielle = (years - 2007) % 5 == 0
+        municipales = (years == 2008) | ((years >= 2014) & ((years - 2014) % 6 == 0))
+        europeennes = (years >= 2009) & ((years - 2009) % 5 == 0)
+        
+        election = (ELECTION_PRESIDENTIELLE * presidentielle
+                    | ELECTION_MUNICIPALES * municipales
+                    | ELECTION_EUROPEENNES * europeennes)
+        
+        return {
+            'annees': years,
+            'indice': np.arange(len(years)),
+            'election': election.astype(np.int8),
+            'phase': (years - 2007) % 5,
+            'regime': np.searchsorted(BORNES_REGIMES, years, side='right'),
+            # Nombre de scrutins de chaque type tenus jusqu'à l'année incluse
+            'scrutins_presidentiels': np.cumsum(presidentielle),
+            'scrutins_municipaux': np.cumsum(municipales),
+            'scrutins_europeens': np.cumsum(europeennes),
+        }
+    
+    def _period_index(self, calendar, bornes):
+        """Indice de période pour des bornes propres à une série (première année de chaque période)"""
+        return np.searchsorted(bornes, calendar['annees'], side='right')
+    
+    def _election_lookup(self, calendar, kind, values):
+        """Multiplicateur du scrutin en cours (1 hors année électorale), dernier connu au-delà"""
+        counts = calendar[kind]
+        rank = np.clip(counts - 1, 0, len(values) - 1)
+        flag = {'scrutins_presidentiels': ELECTION_PRESIDENTIELLE,
+                'scrutins_municipaux': ELECTION_MUNICIPALES,
+                'scrutins_europeens': ELECTION_EUROPEENNES}[kind]
+        held = (calendar['election'] & flag) != 0
+        return np.where(held, self._lookup(values, rank), 1.0)
+    
+    def _innovations(self, calendar, rng):
+        """Tire des innovations N(0, 1) pour tous les scénarios et toutes les années"""
+        return rng.standard_normal(size=(self.n_scenarios, len(calendar['annees'])))
+    
+    def _correlated_noise(self, innovations, metrics):
+        """Corrèle les innovations (scénarios, années, séries) entre séries puis dans le temps"""
+        index = {metric: k for k, metric in enumerate(metrics)}
+        
+        correlation = np.eye(len(metrics))
+        for (first, second), rho in self.noise_model.get('correlations', {}).items():
+            if first in index and second in index:
+                correlation[index[first], index[second]] = rho
+                correlation[index[second], index[first]] = rho
+        try:
+            cholesky = np.linalg.cholesky(correlation)
+        except np.linalg.LinAlgError:
+            raise ValueError("Matrice de corrélation du bruit non définie positive")
+        
+        noise = innovations @ cholesky.T
+        
+        # AR(1) le long de l'axe des années, un filtrage par valeur de persistance ;
+        # état initial choisi pour démarrer dans la loi stationnaire (variance 1)
+        phi = np.array([self.noise_model.get('persistance', {}).get(m, 0.0) for m in metrics])
+        for value in np.unique(phi[phi != 0]):
+            columns = phi == value
+            gain = np.sqrt(1 - value ** 2)
+            block = noise[..., columns]
+            noise[..., columns], _ = lfilter([gain], [1, -value], block, axis=1,
+                                             zi=block[:, :1, :] * (1 - gain))
+        
+        return noise
+    
+    def _broadcast(self, values):
+        """Étend une série déterministe à tous les scénarios"""
+        return np.broadcast_to(values, (self.n_scenarios, len(values))).astype(float)
+    
+    def _simulators(self):
+        """Méthodes de simulation de chaque série, dans l'ordre du jeu de données"""
+        return {
+            # Données d'adhérents et structure
+            'Adherents': self._simulate_adherents,
+            'Comites_Locaux': self._simulate_comites_locaux,
+            'Elus_Locaux': self._simulate_elus_locaux,
+            'Elus_Nationaux': self._simulate_elus_nationaux,
+            'Elus_Europeens': self._simulate_elus_europeens,
+            
+            # Revenus du parti
+            'Revenus_Total': self._simulate_total_revenue,
+            'Cotisations_Adherents': self._simulate_membership_fees,
+            'Dons_Prives': self._simulate_private_donations,
+            'Financement_Public': self._simulate_public_funding,
+            'Revenus_Evenements': self._simulate_event_revenue,
+            'Revenus_Formations': self._simulate_training_revenue,
+            'Financement_Europeen': self._simulate_european_funding,
+            
+            # Dépenses du parti
+            'Depenses_Total': self._simulate_total_expenses,
+            'Depenses_Personnel': self._simulate_staff_expenses,
+            'Depenses_Campagnes': self._simulate_campaign_expenses,
+            'Depenses_Communication': self._simulate_communication_expenses,
+            'Depenses_Fonctionnement': self._simulate_operating_expenses,
+            'Depenses_Formation': self._simulate_training_expenses,
+            'Depenses_Europeennes': self._simulate_european_expenses,
+            
+            # Indicateurs financiers
+            'Taux_Execution_Budget': self._simulate_budget_execution_rate,
+            'Ratio_Cotisations_Revenus': self._simulate_membership_ratio,
+            'Dependance_Financement_Public': self._simulate_public_funding_dependency,
+            'Solde_Financier': self._simulate_financial_balance,
+            'Reserves_Financieres': self._simulate_financial_reserves,
+            
+            # Investissements stratégiques
+            'Investissement_Communication': self._simulate_communication_investment,
+            'Investissement_Numérique': self._simulate_digital_investment,
+            'Investissement_Formation': self._simulate_training_investment,
+            'Investissement_Europe': self._simulate_european_investment,
+            'Investissement_Prospective': self._simulate_prospective_investment,
+        }
+    
+    def _lookup(self, table, index):
+        """Lit une table de paramètres par indice (dernier axe : candidats de calibration possibles)"""
+        return np.asarray(table, dtype=float)[..., index]
+    
+    def _simulate_adherents(self, calendar, params):
         """Simule le nombre d'adhérents"""
         base_adherents = self.config["adherents_base"]
         
-        adherents = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Évolution historique des adhérents selon les périodes politiques
-            if 2007 <= year <= 2008:  # Lancement et élections
-                growth_rate = 0.35
-            elif 2009 <= year <= 2011:  # Consolidation difficile
-                growth_rate = -0.08
-            elif 2012 <= year <= 2016:  # Alliance avec le PS
-                growth_rate = 0.05
-            elif 2017 <= year <= 2022:  # Alliance avec LREM
-                growth_rate = 0.15
-            else:  # 2023-2025
-                growth_rate = 0.03
-                
-            growth = 1 + growth_rate * (i/3)
-            noise = np.random.normal(1, 0.09)
-            adherents.append(base_adherents * growth * noise)
-        
-        return adherents
+        # Évolution historique des adhérents selon les périodes politiques :
+        # lancement, consolidation difficile, alliance PS, alliance LREM, après 2023
+        growth_rate = self._lookup(params['taux'], calendar['regime'])
+        growth = 1 + growth_rate * (calendar['indice'] / 3)
+        return base_adherents * growth
     
-    def _simulate_comites_locaux(self, dates):
+    def _simulate_comites_locaux(self, calendar, params):
         """Simule le nombre de comités locaux"""
         base_comites = 200
         
-        comites = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 2009:
-                growth_rate = 0.20
-            elif year <= 2014:
-                growth_rate = 0.05
-            elif year <= 2020:
-                growth_rate = 0.10
-            else:
-                growth_rate = 0.03
-                
-            growth = 1 + growth_rate * (i/4)
-            comites.append(base_comites * growth)
-        
-        return comites
+        periode = self._period_index(calendar, [2010, 2015, 2021])
+        growth_rate = self._lookup(params['taux'], periode)
+        growth = 1 + growth_rate * (calendar['indice'] / 4)
+        return base_comites * growth
     
-    def _simulate_elus_locaux(self, dates):
+    def _simulate_elus_locaux(self, calendar, params):
         """Simule le nombre d'élus locaux"""
         base_elus = 2000
         
-        elus = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Élections municipales
-            if year in [2008, 2014, 2020]:
-                if year == 2008:  # Premières élections
-                    multiplier = 1.8
-                elif year == 2014:  # Alliance PS
-                    multiplier = 1.4
-                else:  # 2020 - Alliance LREM
-                    multiplier = 1.6
-            else:
-                multiplier = 1.0
-                
-            # Tendance générale
-            if year <= 2012:
-                growth_rate = 0.08
-            elif year <= 2017:
-                growth_rate = 0.12
-            else:
-                growth_rate = 0.06
-                
-            growth = 1 + growth_rate * (i/3)
-            noise = np.random.normal(1, 0.07)
-            elus.append(base_elus * growth * multiplier * noise)
+        # Élections municipales : premières élections, alliance PS, alliance LREM
+        multiplier = self._election_lookup(calendar, 'scrutins_municipaux', params['municipales'])
         
-        return elus
+        # Tendance générale
+        periode = self._period_index(calendar, [2013, 2018])
+        growth_rate = self._lookup(params['taux'], periode)
+        growth = 1 + growth_rate * (calendar['indice'] / 3)
+        return base_elus * growth * multiplier
     
-    def _simulate_elus_nationaux(self, dates):
+    def _simulate_elus_nationaux(self, calendar, params):
         """Simule le nombre d'élus nationaux"""
         base_elus = 10
         
-        elus = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Élections législatives
-            if year == 2007:
-                multiplier = 3.0  # Premier groupe
-            elif year == 2012:
-                multiplier = 1.5  # Quelques élus
-            elif year == 2017:
-                multiplier = 4.5  # Alliance LREM
-            elif year == 2022:
-                multiplier = 3.8  # Maintien
-            else:
-                multiplier = 1.0
-                
-            growth = 1 + 0.08 * (i/2)
-            noise = np.random.normal(1, 0.12)
-            elus.append(base_elus * growth * multiplier * noise)
+        # Élections législatives : premier groupe, quelques élus, alliance LREM, maintien
+        multiplier = self._election_lookup(calendar, 'scrutins_presidentiels', params['legislatives'])
         
-        return elus
+        growth = 1 + params['croissance'] * (calendar['indice'] / 2)
+        return base_elus * growth * multiplier
     
-    def _simulate_elus_europeens(self, dates):
+    def _simulate_elus_europeens(self, calendar, params):
         """Simule le nombre d'élus européens"""
-        elus = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year == 2009:
-                elus.append(6)  # Élections européennes 2009
-            elif year == 2014:
-                elus.append(4)  # Élections européennes 2014
-            elif year == 2019:
-                elus.append(6)  # Élections européennes 2019
-            else:
-                # Garder le même nombre entre les élections
-                if year > 2019:
-                    elus.append(6)
-                elif year > 2014:
-                    elus.append(4)
-                elif year > 2009:
-                    elus.append(6)
-                else:
-                    elus.append(0)
-        
-        return elus
+        # Sièges par mandature (aucun avant 2009), conservés entre les élections
+        sieges = params['sieges']
+        mandature = np.minimum(calendar['scrutins_europeens'], len(sieges) - 1)
+        return self._lookup(sieges, mandature)
     
-    def _simulate_total_revenue(self, dates):
+    def _simulate_total_revenue(self, calendar, params):
         """Simule les revenus totaux"""
         base_revenue = self.config["budget_base"]
         
-        revenue = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Croissance historique des revenus
-            if 2007 <= year <= 2008:  # Lancement
-                growth_rate = 0.25
-            elif 2009 <= year <= 2011:  # Difficultés
-                growth_rate = -0.10
-            elif 2012 <= year <= 2016:  # Gouvernement avec PS
-                growth_rate = 0.08
-            elif 2017 <= year <= 2022:  # Gouvernement avec LREM
-                growth_rate = 0.20
-            else:  # Stabilisation
-                growth_rate = 0.05
-                
-            growth = 1 + growth_rate * (i/3)
-            noise = np.random.normal(1, 0.10)
-            revenue.append(base_revenue * growth * noise)
-        
-        return revenue
+        # Croissance historique : lancement, difficultés, gouvernement avec PS,
+        # gouvernement avec LREM, stabilisation
+        growth_rate = self._lookup(params['taux'], calendar['regime'])
+        growth = 1 + growth_rate * (calendar['indice'] / 3)
+        return base_revenue * growth
     
-    def _simulate_membership_fees(self, dates):
+    def _simulate_membership_fees(self, calendar, params):
         """Simule les cotisations des adhérents"""
-        base_fees = self.config["budget_base"] * 0.25
+        base_fees = self.config["budget_base"] * params['part']
         
-        fees = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 2009:
-                growth_rate = 0.15
-            elif year <= 2014:
-                growth_rate = 0.02
-            elif year <= 2020:
-                growth_rate = 0.10
-            else:
-                growth_rate = 0.04
-                
-            growth = 1 + growth_rate * (i/3)
-            noise = np.random.normal(1, 0.08)
-            fees.append(base_fees * growth * noise)
-        
-        return fees
+        periode = self._period_index(calendar, [2010, 2015, 2021])
+        growth_rate = self._lookup(params['taux'], periode)
+        growth = 1 + growth_rate * (calendar['indice'] / 3)
+        return base_fees * growth
     
-    def _simulate_private_donations(self, dates):
+    def _simulate_private_donations(self, calendar, params):
         """Simule les dons privés"""
-        base_donations = self.config["budget_base"] * 0.30
+        base_donations = self.config["budget_base"] * params['part']
         
-        donations = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Évolution selon les alliances
-            if year <= 2009:  # Période d'indépendance
-                multiplier = 1.1
-            elif year <= 2016:  # Alliance PS
-                multiplier = 0.9
-            elif year <= 2022:  # Alliance LREM
-                multiplier = 1.3
-            else:
-                multiplier = 1.1
-                
-            # Cycles électoraux
-            if year in [2007, 2012, 2017, 2022]:
-                electoral_multiplier = 1.7
-            else:
-                electoral_multiplier = 1.0
-                
-            growth = 1 + 0.04 * (i/3)
-            noise = np.random.normal(1, 0.14)
-            donations.append(base_donations * growth * multiplier * electoral_multiplier * noise)
+        # Évolution selon les alliances : indépendance, alliance PS, alliance LREM, après
+        periode = self._period_index(calendar, [2010, 2017, 2023])
+        multiplier = self._lookup(params['alliances'], periode)
         
-        return donations
+        # Cycles électoraux
+        electoral_multiplier = self._lookup(params['cycle'], calendar['phase'])
+        
+        growth = 1 + params['croissance'] * (calendar['indice'] / 3)
+        return base_donations * growth * multiplier * electoral_multiplier
     
-    def _simulate_public_funding(self, dates):
+    def _simulate_public_funding(self, calendar, params):
         """Simule le financement public"""
-        base_funding = self.config["budget_base"] * 0.25
+        base_funding = self.config["budget_base"] * params['part']
         
-        funding = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Dépend des résultats électoraux
-            if year < 2009:
-                multiplier = 0.6  # Peu d'élus
-            elif year < 2014:
-                multiplier = 0.8  # Quelques élus
-            elif year < 2017:
-                multiplier = 1.2  # Participation gouvernement
-            else:
-                multiplier = 1.6  # Alliance LREM
-                
-            growth = 1 + 0.06 * (i/3)
-            noise = np.random.normal(1, 0.09)
-            funding.append(base_funding * growth * multiplier * noise)
+        # Dépend des résultats électoraux : peu d'élus, quelques élus,
+        # participation gouvernement, alliance LREM
+        periode = self._period_index(calendar, [2009, 2014, 2017])
+        multiplier = self._lookup(params['resultats'], periode)
         
-        return funding
+        growth = 1 + params['croissance'] * (calendar['indice'] / 3)
+        return base_funding * growth * multiplier
     
-    def _simulate_event_revenue(self, dates):
+    def _simulate_event_revenue(self, calendar, params):
         """Simule les revenus des événements"""
-        base_revenue = self.config["budget_base"] * 0.08
+        base_revenue = self.config["budget_base"] * params['part']
         
-        revenue = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Université d'été, conventions, etc.
-            if year in [2007, 2012, 2017, 2022]:
-                multiplier = 1.8  # Années électorales
-            else:
-                multiplier = 1.0
-                
-            growth = 1 + 0.05 * (i/3)
-            noise = np.random.normal(1, 0.12)
-            revenue.append(base_revenue * growth * multiplier * noise)
+        # Université d'été, conventions, etc. (années électorales)
+        multiplier = self._lookup(params['cycle'], calendar['phase'])
         
-        return revenue
+        growth = 1 + params['croissance'] * (calendar['indice'] / 3)
+        return base_revenue * growth * multiplier
     
-    def _simulate_training_revenue(self, dates):
+    def _simulate_training_revenue(self, calendar, params):
         """Simule les revenus des formations"""
-        base_revenue = self.config["budget_base"] * 0.05
-        
-        revenue = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2010:  # Développement des formations
-                growth = 1 + 0.07 * max(0, (year - 2010)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.10)
-            revenue.append(base_revenue * growth * noise)
+        base_revenue = self.config["budget_base"] * params['part']
         
-        return revenue
+        # Développement des formations à partir de 2010
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2010) / 10)
+        return base_revenue * growth
     
-    def _simulate_european_funding(self, dates):
+    def _simulate_european_funding(self, calendar, params):
         """Simule le financement européen"""
-        base_funding = self.config["budget_base"] * 0.07
+        base_funding = self.config["budget_base"] * params['part']
         
-        funding = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2009:  # Élus européens
-                multiplier = 1.5
-            else:
-                multiplier = 0.5
-                
-            growth = 1 + 0.04 * max(0, (year - 2007)/10)
-            noise = np.random.normal(1, 0.15)
-            funding.append(base_funding * growth * multiplier * noise)
+        # Élus européens à partir de 2009
+        multiplier = self._lookup(params['mandats'], self._period_index(calendar, [2009]))
         
-        return funding
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2007) / 10)
+        return base_funding * growth * multiplier
     
-    def _simulate_total_expenses(self, dates):
+    def _simulate_total_expenses(self, calendar, params):
         """Simule les dépenses totales"""
-        base_expenses = self.config["budget_base"] * 0.92
+        base_expenses = self.config["budget_base"] * params['part']
         
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [2007, 2012, 2017, 2022]:  # Années électorales
-                multiplier = 1.5
-            else:
-                multiplier = 1.0
-                
-            growth = 1 + 0.05 * (i/3)
-            noise = np.random.normal(1, 0.08)
-            expenses.append(base_expenses * growth * multiplier * noise)
+        # Années électorales
+        multiplier = self._lookup(params['cycle'], calendar['phase'])
         
-        return expenses
+        growth = 1 + params['croissance'] * (calendar['indice'] / 3)
+        return base_expenses * growth * multiplier
     
-    def _simulate_staff_expenses(self, dates):
+    def _simulate_staff_expenses(self, calendar, params):
         """Simule les dépenses de personnel"""
-        base_staff = self.config["budget_base"] * 0.30
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 2012:
-                growth_rate = 0.10
-            elif year <= 2017:
-                growth_rate = 0.05
-            else:
-                growth_rate = 0.08
-                
-            growth = 1 + growth_rate * (i/4)
-            noise = np.random.normal(1, 0.06)
-            expenses.append(base_staff * growth * noise)
+        base_staff = self.config["budget_base"] * params['part']
         
-        return expenses
+        periode = self._period_index(calendar, [2013, 2018])
+        growth_rate = self._lookup(params['taux'], periode)
+        growth = 1 + growth_rate * (calendar['indice'] / 4)
+        return base_staff * growth
     
-    def _simulate_campaign_expenses(self, dates):
+    def _simulate_campaign_expenses(self, calendar, params):
         """Simule les dépenses de campagne"""
-        base_campaign = self.config["budget_base"] * 0.25
+        base_campaign = self.config["budget_base"] * params['part']
         
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [2007, 2012, 2017, 2022]:  # Années électorales
-                multiplier = 2.2
-            elif year in [2006, 2011, 2016, 2021]:  # Années pré-électorales
-                multiplier = 1.4
-            else:
-                multiplier = 0.6
-                
-            growth = 1 + 0.04 * (i/3)
-            noise = np.random.normal(1, 0.18)
-            expenses.append(base_campaign * growth * multiplier * noise)
+        # Années électorales, creux post-électoral, années pré-électorales
+        multiplier = self._lookup(params['cycle'], calendar['phase'])
         
-        return expenses
+        growth = 1 + params['croissance'] * (calendar['indice'] / 3)
+        return base_campaign * growth * multiplier
     
-    def _simulate_communication_expenses(self, dates):
+    def _simulate_communication_expenses(self, calendar, params):
         """Simule les dépenses de communication"""
-        base_communication = self.config["budget_base"] * 0.15
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2008:
-                growth = 1 + 0.08 * max(0, (year - 2008)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.11)
-            expenses.append(base_communication * growth * noise)
+        base_communication = self.config["budget_base"] * params['part']
         
-        return expenses
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2008) / 10)
+        return base_communication * growth
     
-    def _simulate_operating_expenses(self, dates):
+    def _simulate_operating_expenses(self, calendar, params):
         """Simule les dépenses de fonctionnement"""
-        base_operating = self.config["budget_base"] * 0.12
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            growth = 1 + 0.03 * (i/4)
-            noise = np.random.normal(1, 0.05)
-            expenses.append(base_operating * growth * noise)
+        base_operating = self.config["budget_base"] * params['part']
         
-        return expenses
+        growth = 1 + params['croissance'] * (calendar['indice'] / 4)
+        return base_operating * growth
     
-    def _simulate_training_expenses(self, dates):
+    def _simulate_training_expenses(self, calendar, params):
         """Simule les dépenses de formation"""
-        base_training = self.config["budget_base"] * 0.06
+        base_training = self.config["budget_base"] * params['part']
         
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2009:
-                growth = 1 + 0.06 * max(0, (year - 2009)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.09)
-            expenses.append(base_training * growth * noise)
-        
-        return expenses
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2009) / 10)
+        return base_training * growth
     
-    def _simulate_european_expenses(self, dates):
+    def _simulate_european_expenses(self, calendar, params):
         """Simule les dépenses européennes"""
-        base_european = self.config["budget_base"] * 0.04
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2009:
-                growth = 1 + 0.05 * max(0, (year - 2009)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.13)
-            expenses.append(base_european * growth * noise)
+        base_european = self.config["budget_base"] * params['part']
         
-        return expenses
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2009) / 10)
+        return base_european * growth
     
-    def _simulate_budget_execution_rate(self, dates):
+    def _simulate_budget_execution_rate(self, calendar, params):
         """Simule le taux d'exécution du budget"""
-        rates = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 2010:
-                base_rate = 0.82
-            elif year <= 2016:
-                base_rate = 0.85
-            else:
-                base_rate = 0.88
-                
-            noise = np.random.normal(1, 0.04)
-            rates.append(base_rate * noise)
-        
-        return rates
+        periode = self._period_index(calendar, [2011, 2017])
+        return self._lookup(params['niveaux'], periode)
     
-    def _simulate_membership_ratio(self, dates):
+    def _simulate_membership_ratio(self, calendar, params):
         """Simule le ratio cotisations/revenus"""
-        ratios = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 2010:
-                base_ratio = 0.28
-            elif year <= 2017:
-                base_ratio = 0.25
-            else:
-                base_ratio = 0.22
-                
-            noise = np.random.normal(1, 0.05)
-            ratios.append(base_ratio * noise)
-        
-        return ratios
+        periode = self._period_index(calendar, [2011, 2018])
+        return self._lookup(params['niveaux'], periode)
     
-    def _simulate_public_funding_dependency(self, dates):
+    def _simulate_public_funding_dependency(self, calendar, params):
         """Simule la dépendance au financement public"""
-        dependencies = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 2010:
-                base_dependency = 0.20
-            elif year <= 2017:
-                base_dependency = 0.28
-            else:
-                base_dependency = 0.35
-                
-            noise = np.random.normal(1, 0.06)
-            dependencies.append(base_dependency * noise)
-        
-        return dependencies
+        periode = self._period_index(calendar, [2011, 2018])
+        return self._lookup(params['niveaux'], periode)
     
-    def _simulate_financial_balance(self, dates):
+    def _simulate_financial_balance(self, calendar, params):
         """Simule le solde financier"""
-        balances = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [2007, 2012, 2017, 2022]:  # Déficits électoraux
-                base_balance = -0.08
-            elif year in [2008, 2013, 2018, 2023]:  # Redressement
-                base_balance = 0.04
-            else:
-                base_balance = 0.02
-                
-            noise = np.random.normal(1, 0.09)
-            balances.append(base_balance * noise)
-        
-        return balances
+        # Déficits électoraux, redressement, puis léger excédent
+        return self._lookup(params['cycle'], calendar['phase'])
     
-    def _simulate_financial_reserves(self, dates):
+    def _simulate_financial_reserves(self, calendar, params):
         """Simule les réserves financières"""
-        base_reserves = self.config["budget_base"] * 0.4
+        base_reserves = self.config["reserves_base"]
         
-        reserves = []
-        current_reserves = base_reserves
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [2007, 2012, 2017, 2022]:  # Utilisation des réserves
-                change_rate = -0.15
-            elif year in [2008, 2013, 2018, 2023]:  # Reconstitution
-                change_rate = 0.10
-            else:
-                change_rate = 0.03
-                
-            current_reserves *= (1 + change_rate)
-            noise = np.random.normal(1, 0.08)
-            reserves.append(current_reserves * noise)
+        # Utilisation des réserves en année électorale, reconstitution l'année suivante
+        change_rate = self._lookup(params['cycle'], calendar['phase'])
         
-        return reserves
+        # Récurrence r[t] = r[t-1] * (1 + taux[t]) calculée par produit cumulé
+        return base_reserves * np.cumprod(1 + change_rate, axis=-1)
     
-    def _simulate_communication_investment(self, dates):
+    def _simulate_communication_investment(self, calendar, params):
         """Simule l'investissement en communication"""
-        base_investment = self.config["budget_base"] * 0.09
+        base_investment = self.config["budget_base"] * params['part']
         
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2008:
-                growth = 1 + 0.10 * max(0, (year - 2008)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.14)
-            investment.append(base_investment * growth * noise)
-        
-        return investment
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2008) / 10)
+        return base_investment * growth
     
-    def _simulate_digital_investment(self, dates):
+    def _simulate_digital_investment(self, calendar, params):
         """Simule l'investissement numérique"""
-        base_investment = self.config["budget_base"] * 0.07
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2012:
-                growth = 1 + 0.15 * max(0, (year - 2012)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.17)
-            investment.append(base_investment * growth * noise)
+        base_investment = self.config["budget_base"] * params['part']
         
-        return investment
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2012) / 10)
+        return base_investment * growth
     
-    def _simulate_training_investment(self, dates):
+    def _simulate_training_investment(self, calendar, params):
         """Simule l'investissement en formation"""
-        base_investment = self.config["budget_base"] * 0.05
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2009:
-                growth = 1 + 0.08 * max(0, (year - 2009)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.12)
-            investment.append(base_investment * growth * noise)
+        base_investment = self.config["budget_base"] * params['part']
         
-        return investment
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2009) / 10)
+        return base_investment * growth
     
-    def _simulate_european_investment(self, dates):
+    def _simulate_european_investment(self, calendar, params):
         """Simule l'investissement européen"""
-        base_investment = self.config["budget_base"] * 0.04
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2009:
-                growth = 1 + 0.06 * max(0, (year - 2009)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.16)
-            investment.append(base_investment * growth * noise)
+        base_investment = self.config["budget_base"] * params['part']
         
-        return investment
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2009) / 10)
+        return base_investment * growth
     
-    def _simulate_prospective_investment(self, dates):
+    def _simulate_prospective_investment(self, calendar, params):
         """Simule l'investissement en prospective"""
-        base_investment = self.config["budget_base"] * 0.03
+        base_investment = self.config["budget_base"] * params['part']
         
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2010:
-                growth = 1 + 0.05 * max(0, (year - 2010)/10)
+        growth = 1 + params['croissance'] * np.maximum(0, (calendar['annees'] - 2010) / 10)
+        return base_investment * growth
+    
+    def _add_party_trends(self, data, calendar):
+        """Ajoute des tendances réalistes pour le MoDem"""
+        years = calendar['annees']
+        
+        for metric, first, last, operation, value in TENDANCES_PARTI:
+            if metric not in data:
+                continue
+            selection = (years >= first) & (years <= last)
+            if operation == 'facteur':
+                data[metric][..., selection] *= value
             else:
-                growth = 1
+                data[metric][..., selection] = value
+    
+    def _anchor_ledger(self, expected, calendar):
+        """Recale les postes attendus sur le budget et le solde modélisés (mode comptable)
+        
+        Les parts du profil ne somment pas à 1 (0,92 pour les dépenses) : sans recalage,
+        les postes dégageraient un excédent structurel de l'ordre de 20 % du budget. Un
+        facteur par année, tendances comprises, ramène la somme attendue des recettes sur
+        Revenus_Total et celle des dépenses sur Revenus_Total × (1 - Solde_Financier).
+        """
+        anchors = ['Revenus_Total', 'Solde_Financier'] + COMPOSANTES_REVENUS + COMPOSANTES_DEPENSES
+        paths = {metric: np.array(expected[metric], dtype=float) for metric in anchors}
+        self._add_party_trends(paths, calendar)
+        
+        revenues = paths['Revenus_Total']
+        targets = [(COMPOSANTES_REVENUS, revenues),
+                   (COMPOSANTES_DEPENSES, revenues * (1 - paths['Solde_Financier']))]
+        for components, target in targets:
+            factor = target / np.sum([paths[c] for c in components], axis=0)
+            for component in components:
+                expected[component] = expected[component] * factor
+    
+    def _apply_ledger(self, data):
+        """Recalcule totaux, solde et réserves à partir des postes (mode comptable)"""
+        revenues = np.sum([data[c] for c in COMPOSANTES_REVENUS], axis=0)
+        expenses = np.sum([data[c] for c in COMPOSANTES_DEPENSES], axis=0)
+        balance = revenues - expenses
+        
+        data['Revenus_Total'] = revenues
+        data['Depenses_Total'] = expenses
+        # Solde exprimé en part du budget, comme en mode indépendant
+        data['Solde_Financier'] = balance / revenues
+        # Réserves = réserves initiales + soldes cumulés (M€), tous scénarios à la fois
+        data['Reserves_Financieres'] = self.config["reserves_base"] + np.cumsum(balance, axis=-1)
+        
+        # Ratios recalculés à partir des flux plutôt que tirés indépendamment
+        for name in ('Taux_Execution_Budget', 'Ratio_Cotisations_Revenus', 'Dependance_Financement_Public'):
+            numerator, denominator, factor = INDICATEURS_DERIVES[name][:3]
+            data[name] = factor * np.sum([data[c] for c in numerator], axis=0) / \
+                np.sum([data[c] for c in denominator], axis=0)
+    
+    def forecast(self, ensemble, horizon=5, method='ridge', alpha=0.05, n_jobs=None, chunk_size=64):
+        """Prévoit toutes les métriques de l'ensemble au-delà de la dernière année simulée
+        
+        Historique simulé ou observé : chaque série est ajustée sur ses seules années
+        renseignées ; les séries vides ou trop courtes ont des prévisions NaN.
+        """
+        years = ensemble['annees']
+        values = ensemble['valeurs']
+        n_scenarios, n_years, n_metrics = values.shape
+        future = np.arange(years[-1] + 1, years[-1] + horizon + 1)
+        
+        minimum = self._regime_features(years).shape[1] + 2 if method == 'ridge' else HISTORIQUE_MIN_ETS
+        if n_years < minimum:
+            raise ValueError(f"Historique trop court pour la méthode {method}: "
+                             f"{n_years} années, {minimum} au minimum")
+        
+        # Une seule empreinte pour tout le bloc de séries et les options de prévision
+        key = hashlib.sha1(repr((method, horizon, alpha, values.shape)).encode() + years.tobytes())
+        key.update(np.ascontiguousarray(values).tobytes())
+        key = key.hexdigest()
+        
+        if key in self._forecast_cache:
+            self._forecast_cache.move_to_end(key)
+        else:
+            # Une colonne par couple (scénario, métrique) : tous les ajustements en un lot
+            series = values.transpose(1, 0, 2).reshape(n_years, n_scenarios * n_metrics)
+            if method == 'ridge':
+                results = self._fit_ridge_batch(series, years, future, alpha)
+            elif method == 'ets':
+                results = self._fit_ets_batch(series, horizon, alpha, n_jobs, chunk_size)
+            else:
+                raise ValueError(f"Méthode de prévision inconnue: {method}")
+            
+            shape = (horizon, n_scenarios, n_metrics)
+            self._forecast_cache[key] = tuple(r.reshape(shape).transpose(1, 0, 2) for r in results)
+            if len(self._forecast_cache) > TAILLE_CACHE_PREVISIONS:
+                self._forecast_cache.popitem(last=False)
+        
+        mean, lower, upper = self._forecast_cache[key]
+        return {
+            'annees': future,
+            'metriques': list(ensemble['metriques']),
+            'prevision': mean.copy(),
+            'borne_basse': lower.copy(),
+            'borne_haute': upper.copy(),
+        }
+    
+    def _regime_features(self, years):
+        """Construit les variables explicatives (tendance, cycle électoral, régime politique)"""
+        calendar = self._build_calendar(years)
+        phase = calendar['phase']
+        regime = calendar['regime']
+        
+        columns = [calendar['annees'] - self.start_year, phase == 0, phase == 4, phase == 1]
+        columns += [regime == r for r in range(1, len(BORNES_REGIMES) + 1)]
+        return np.column_stack(columns).astype(float)
+    
+    def _fit_ridge_batch(self, series, years, future, alpha, ridge_alpha=1.0):
+        """Régression ridge multi-sorties : un seul ajustement pour toutes les séries"""
+        features = self._regime_features(years)
+        future_features = self._regime_features(future)
+        z = norm.ppf(1 - alpha / 2)
+        mean = np.full((len(future), series.shape[1]), np.nan)
+        lower, upper = mean.copy(), mean.copy()
+        
+        # Un ajustement par motif d'années renseignées (un seul pour des séries complètes)
+        finite = np.isfinite(series)
+        packed = np.ascontiguousarray(np.packbits(finite, axis=0).T)
+        codes = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+        _, first, group = np.unique(codes, return_index=True, return_inverse=True)
+        for k, rows in enumerate(finite[:, first].T):
+            # Au moins deux degrés de liberté pour l'écart-type des résidus
+            if rows.sum() < features.shape[1] + 2:
+                continue
+            columns = np.flatnonzero(group.ravel() == k)
+            block = series[np.ix_(rows, columns)]
+            model = Ridge(alpha=ridge_alpha).fit(features[rows], block)
+            
+            residuals = block - model.predict(features[rows]).reshape(block.shape)
+            sigma = residuals.std(axis=0, ddof=features.shape[1] + 1)
+            
+            prediction = model.predict(future_features).reshape(len(future), -1)
+            mean[:, columns] = prediction
+            lower[:, columns] = prediction - z * sigma
+            upper[:, columns] = prediction + z * sigma
+        
+        return mean, lower, upper
+    
+    def _fit_ets_batch(self, series, horizon, alpha, n_jobs, chunk_size):
+        """Ajuste les modèles ETS par paquets de séries dans un pool de processus"""
+        chunks = [series[:, i:i + chunk_size] for i in range(0, series.shape[1], chunk_size)]
+        
+        if n_jobs == 1:
+            results = [_fit_ets_chunk(chunk, horizon, alpha) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                results = list(pool.map(_fit_ets_chunk, chunks, repeat(horizon), repeat(alpha)))
+        
+        return tuple(np.concatenate([r[k] for r in results], axis=1) for k in range(3))
+    
+    def load_profile(self, profile):
+        """Charge un profil de paramètres (dict ou fichier JSON) par-dessus le profil courant"""
+        if isinstance(profile, str):
+            with open(profile, encoding='utf-8') as f:
+                profile = json.load(f)
+        
+        for metric, params in profile.items():
+            self.profile.setdefault(metric, {}).update(params)
+    
+    def save_profile(self, output_file):
+        """Sauvegarde le profil de paramètres courant en JSON"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.profile, f, ensure_ascii=False, indent=2)
+        print(f"💾 Profil sauvegardé: {output_file}")
+    
+    def calibrate(self, observed, metrics=None, restarts=4, n_jobs=None, maxiter=100,
+                  popsize=20, seed=None, output_file=None):
+        """Calibre les paramètres du profil sur des séries observées (DataFrame avec 'Annee')"""
+        observed = observed[observed['Annee'] >= self.start_year].sort_values('Annee')
+        years = observed['Annee'].to_numpy()
+        calendar = self._build_calendar(np.arange(self.start_year, years.max() + 1))
+        positions = years - self.start_year
+        
+        if metrics is None:
+            metrics = [m for m in METRIQUES if m in observed and observed[m].notna().sum() >= 3]
+        
+        # Graines indépendantes par redémarrage ; le profil courant sert de point de départ
+        seeds = np.random.SeedSequence(seed).generate_state(restarts).tolist()
+        
+        calibrated = copy.deepcopy(self.profile)
+        print(f"🎯 Calibration de {len(metrics)} séries ({restarts} redémarrages)...")
+        
+        # Un seul pool de processus pour toutes les séries
+        parallel = n_jobs != 1 and restarts > 1
+        with ProcessPoolExecutor(max_workers=n_jobs) if parallel else contextlib.nullcontext() as pool:
+            for metric in metrics:
+                values = observed[metric].to_numpy(dtype=float)
+                valid = ~np.isnan(values)
+                args = (metric, calendar, positions[valid], values[valid])
                 
-            noise = np.random.normal(1, 0.18)
-            investment.append(base_investment * growth * noise)
+                if pool is None:
+                    results = [self._calibration_restart(*args, s, maxiter, popsize) for s in seeds]
+                else:
+                    results = list(pool.map(self._calibration_restart, *[repeat(a) for a in args],
+                                            seeds, repeat(maxiter), repeat(popsize)))
+                
+                loss, x = min(results, key=lambda r: r[0])
+                calibrated[metric] = self._calibrated_params(metric, x, *args[1:])
+                print(f"   {metric}: erreur quadratique relative {loss:.4f}")
+        
+        self.profile = calibrated
+        if output_file:
+            self.save_profile(output_file)
         
-        return investment
+        return calibrated
     
-    def _add_party_trends(self, df):
-        """Ajoute des tendances réalistes pour le MoDem"""
-        for i, row in df.iterrows():
-            year = row['Annee']
-            
-            # Création du MoDem (2007)
-            if year == 2007:
-                df.loc[i, 'Revenus_Total'] *= 1.6
-                df.loc[i, 'Adherents'] *= 2.2
+    def _calibration_layout(self, params):
+        """Paramètres ajustables d'une série et leurs tailles"""
+        return [(name, np.size(value)) for name, value in params.items()
+                if name not in PARAMETRES_FIXES]
+    
+    def _unpack_candidates(self, params, layout, x):
+        """Reconstruit les paramètres de K candidats à partir d'une matrice (n_paramètres, K)"""
+        candidates = dict(params)
+        row = 0
+        for name, size in layout:
+            block = x[row:row + size].T  # (K, taille)
+            candidates[name] = block if np.ndim(params[name]) else block[:, :1]
+            row += size
+        return candidates
+    
+    def _expected_paths(self, metric, calendar, params, n_candidates):
+        """Trajectoires attendues (sans bruit) de K jeux de paramètres, tendances comprises"""
+        expected = self._simulators()[metric](calendar, params)
+        paths = {metric: np.broadcast_to(expected, (n_candidates, len(calendar['annees']))).copy()}
+        self._add_party_trends(paths, calendar)
+        return paths[metric]
+    
+    def _calibration_loss(self, x, metric, layout, calendar, positions, values):
+        """Erreur de tous les candidats en un seul passage vectorisé"""
+        single = x.ndim == 1
+        x = x.reshape(len(x), -1)
+        
+        params = self._unpack_candidates(self.profile[metric], layout, x)
+        predicted = self._expected_paths(metric, calendar, params, x.shape[1])[:, positions]
+        
+        # Niveau optimal en forme fermée (moindres carrés) pour chaque candidat
+        scale = (predicted @ values) / np.maximum((predicted ** 2).sum(axis=1), 1e-12)
+        residuals = values - scale[:, None] * predicted
+        loss = (residuals ** 2).sum(axis=1) / (values ** 2).sum()
+        return loss[0] if single else loss
+    
+    def _calibration_restart(self, metric, calendar, positions, values, seed, maxiter, popsize):
+        """Un redémarrage d'évolution différentielle, population évaluée par lots"""
+        params = self.profile[metric]
+        layout = self._calibration_layout(params)
+        if not layout:
+            return 0.0, np.empty(0)
+        
+        x0 = np.concatenate([np.ravel(params[name]) for name, _ in layout]).astype(float)
+        margin = np.maximum(0.5 * np.abs(x0), 0.1)
+        
+        result = differential_evolution(
+            self._calibration_loss, list(zip(x0 - margin, x0 + margin)),
+            args=(metric, layout, calendar, positions, values),
+            x0=x0, seed=seed, maxiter=maxiter, popsize=popsize,
+            vectorized=True, updating='deferred', polish=True, tol=1e-8)
+        return result.fun, result.x
+    
+    def _calibrated_params(self, metric, x, calendar, positions, values):
+        """Paramètres calibrés d'une série : optimum, niveau et écart-type du bruit"""
+        params = self.profile[metric]
+        layout = self._calibration_layout(params)
+        candidates = self._unpack_candidates(params, layout, x.reshape(-1, 1))
+        predicted = self._expected_paths(metric, calendar, candidates, 1)[0, positions]
+        
+        scale = float(predicted @ values / max(predicted @ predicted, 1e-12))
+        
+        calibrated = dict(params)
+        for name, _ in layout:
+            value = candidates[name][0]
+            calibrated[name] = value.tolist() if np.ndim(params[name]) else float(value[0])
+        calibrated['echelle'] = scale
+        
+        # Bruit ré-estimé pour les seules séries bruitées (l'ensemble des séries bruitées est
+        # conservé), sur les années où la trajectoire attendue n'est pas nulle
+        fitted = scale * predicted
+        informative = fitted != 0
+        if params['bruit'] > 0 and informative.sum() > 1:
+            calibrated['bruit'] = float(np.std(values[informative] / fitted[informative], ddof=1))
+        return calibrated
+    
+    def depletion_risk(self, floor=1.0, after_year=2022, n_scenarios=20000, metrics=None,
+                       rho=0.1, pilot_size=10000, max_iter=40, alpha=0.99, n_batches=10,
+                       defensive=0.1):
+        """Risque d'épuisement des réserves par échantillonnage préférentiel (entropie croisée)
+        
+        Estime P(réserves < plancher une année >= after_year), la VaR/ES du pire solde
+        annuel sur la même période et la loi du délai d'épuisement, avec leurs variances.
+        La proposition est un mélange : une composante par année de la fenêtre, décalée
+        par entropie croisée vers un passage sous le plancher cette année-là, et une
+        composante non décalée de part `defensive`. Chaque tirage est pondéré par le
+        rapport p / q du mélange entier ; la taille effective d'échantillon des tirages
+        en épuisement accompagne la variance.
+        La VaR/ES (queue à 1 - alpha, non rare) est estimée sur un ensemble non décalé :
+        les poids réglés sur l'épuisement la rendraient instable.
+        """
+        if metrics is None:
+            metrics = COMPOSANTES_REVENUS + COMPOSANTES_DEPENSES if self.ledger else ['Reserves_Financieres']
+        years = np.arange(self.start_year, self.end_year + 1)
+        window = years >= after_year
+        
+        # Effectifs par composante (défensive d'abord), arrondis sur les parts cumulées
+        shares = np.concatenate([[defensive], np.full(window.sum(), (1 - defensive) / window.sum())])
+        counts = np.diff(np.round(np.concatenate([[0], np.cumsum(shares)]) * n_scenarios)).astype(int)
+        
+        previous = self.n_scenarios
+        try:
+            tilts = [{metric: np.zeros(len(years)) for metric in metrics}]
+            tilts += [self._cross_entropy_tilt(floor, after_year, year, metrics, rho, pilot_size, max_iter)
+                      for year in years[window]]
+            parts = [self.generate_ensemble(n, tilt=tilt) for n, tilt in zip(counts, tilts)]
+            reference = self.generate_ensemble(n_scenarios)
+        finally:
+            self.n_scenarios = previous
+        
+        reserves = np.concatenate([part['valeurs'][:, window, part['metriques'].index('Reserves_Financieres')]
+                                   for part in parts])
+        balance = reference['valeurs'][:, window, reference['metriques'].index('Solde_Financier')]
+        
+        # Poids p / q du mélange (heuristique de balance) : log q/p de chaque composante
+        # évalué sur les innovations de chaque tirage, quelle que soit sa composante
+        innovations = {metric: np.concatenate([part['innovations'][metric] for part in parts])
+                       for metric in metrics}
+        log_ratios = np.array([sum(innovations[m] @ tilt[m] - tilt[m] @ tilt[m] / 2 for m in metrics)
+                               for tilt in tilts])
+        with np.errstate(divide='ignore'):
+            log_shares = np.log(counts / n_scenarios)
+        weights = np.exp(-np.logaddexp.reduce(log_shares[:, None] + log_ratios, axis=0))
+        
+        # Probabilité d'épuisement et variance de l'estimateur (tirage stratifié par composante)
+        depleted = reserves < floor
+        event = depleted.any(axis=1)
+        terms = weights * event
+        probability = terms.mean()
+        strata = np.split(terms, np.cumsum(counts)[:-1])
+        variance = sum((len(t) / n_scenarios) ** 2 * t.var(ddof=1) / len(t) for t in strata if len(t) > 1)
+        naive_variance = probability * (1 - probability) / n_scenarios
+        effective_size = terms.sum() ** 2 / (terms ** 2).sum() if event.any() else 0.0
+        
+        # Délai d'épuisement : année du premier passage sous le plancher
+        first = np.where(event, depleted.argmax(axis=1), -1)
+        timing = pd.Series([(weights * (first == k)).mean() for k in range(window.sum())],
+                           index=years[window], name='Probabilite_Epuisement')
+        
+        # VaR / ES de la perte (opposé du pire solde annuel), variance par lots
+        losses = -balance.min(axis=1)
+        unit = np.ones(n_scenarios)
+        var, es = self._weighted_var_es(losses, unit, alpha)
+        batches = np.array([self._weighted_var_es(l, w, alpha) for l, w in
+                            zip(np.array_split(losses, n_batches), np.array_split(unit, n_batches))])
+        
+        results = {
+            'probabilite': probability,
+            'variance': variance,
+            'taille_effective': effective_size,
+            'erreur_relative': np.sqrt(variance) / probability if probability > 0 else np.inf,
+            'gain_variance': naive_variance / variance if variance > 0 else np.inf,
+            'var_solde': var,
+            'es_solde': es,
+            'variance_var': batches[:, 0].var(ddof=1) / n_batches,
+            'variance_es': batches[:, 1].var(ddof=1) / n_batches,
+            'delai_epuisement': timing,
+            'decalages': dict(zip(years[window].tolist(), tilts[1:])),
+            'melange': pd.Series(counts / n_scenarios, index=['defensive'] + years[window].tolist(),
+                                 name='Part'),
+        }
+        
+        print(f"⚠️ RISQUE D'ÉPUISEMENT DES RÉSERVES (< {floor} M€ à partir de {after_year})")
+        print(f"Probabilité d'épuisement: {probability:.3e} "
+              f"(erreur relative {results['erreur_relative']:.1%}, "
+              f"taille effective {effective_size:,.0f})")
+        print(f"Gain de variance vs Monte Carlo simple: x{results['gain_variance']:,.0f}")
+        print(f"VaR {alpha:.0%} du pire solde annuel: {var * 100:.1f}% du budget")
+        print(f"Expected shortfall {alpha:.0%}: {es * 100:.1f}% du budget")
+        
+        return results
+    
+    def _cross_entropy_tilt(self, floor, after_year, year, metrics, rho, pilot_size, max_iter):
+        """Ajuste les décalages d'innovations vers un passage sous le plancher en `year`
+        
+        Seules les années de after_year à `year` sont décalées (entropie croisée) : les
+        autres innovations restent sous leur loi d'origine.
+        """
+        years = np.arange(self.start_year, self.end_year + 1)
+        active = (years >= after_year) & (years <= year)
+        tilt = {metric: np.zeros(len(years)) for metric in metrics}
+        
+        for _ in range(max_iter):
+            ensemble = self.generate_ensemble(pilot_size, tilt=tilt)
+            reserves = ensemble['valeurs'][:, years == year, ensemble['metriques'].index('Reserves_Financieres')]
             
-            # Élection présidentielle 2007 (score de Bayrou)
-            if year == 2007:
-                df.loc[i, 'Dons_Prives'] *= 2.5
-                df.loc[i, 'Depenses_Campagnes'] *= 2.8
+            # Niveau intermédiaire : quantile 1-rho du score, borné par l'événement cible
+            score = floor - reserves[:, 0]
+            level = min(np.quantile(score, 1 - rho), 0.0)
+            elite = score >= level
+            log_weights = ensemble['log_poids'][elite]
+            weights = np.exp(log_weights - log_weights.max())
             
-            # Européennes 2009
-            if year == 2009:
-                df.loc[i, 'Elus_Europeens'] = 6
-                df.loc[i, 'Financement_Europeen'] *= 1.8
+            # Mise à jour en forme fermée : moyenne pondérée, année par année,
+            # des innovations de l'élite
+            for metric in metrics:
+                tilt[metric][active] = np.average(ensemble['innovations'][metric][elite][:, active],
+                                                  axis=0, weights=weights)
             
-            # Alliance avec le PS (2012)
-            if year == 2012:
-                df.loc[i, 'Financement_Public'] *= 1.4
-                df.loc[i, 'Elus_Nationaux'] *= 1.6
+            if level >= 0:
+                break
+        
+        return tilt
+    
+    def _weighted_var_es(self, losses, weights, alpha):
+        """VaR et expected shortfall pondérés (poids auto-normalisés)"""
+        order = np.argsort(losses)
+        losses, weights = losses[order], weights[order]
+        cumulative = np.cumsum(weights) / weights.sum()
+        
+        cut = min(np.searchsorted(cumulative, alpha), len(losses) - 1)
+        tail = weights[cut:]
+        return losses[cut], np.average(losses[cut:], weights=tail)
+    
+    def _cash_profiles(self, calendar):
+        """Répartition trimestrielle (T, 4) de chaque flux, selon le calendrier électoral"""
+        n_years = len(calendar['annees'])
+        profiles = {flow: np.tile(weights, (n_years, 1))
+                    for flow, weights in PROFILS_TRESORERIE.items()}
+        
+        # Années de scrutin : moyenne des profils des élections de l'année (2014 cumule deux scrutins)
+        campaign = np.zeros((n_years, 4))
+        count = np.zeros((n_years, 1))
+        for kind, weights in PROFILS_CAMPAGNE.items():
+            held = (calendar['election'] & kind) > 0
+            campaign[held] += weights
+            count[held] += 1
+        elections = count[:, 0] > 0
+        profiles['Depenses_Campagnes'][elections] = campaign[elections] / count[elections]
+        return profiles
+    
+    def simulate_liquidity(self, ensemble, floor=0.0, alpha=0.95, opening=None):
+        """Simule la trésorerie trimestrielle de chaque scénario et ses points bas
+        
+        Chaque flux annuel des postes de revenus et de dépenses est réparti par trimestre ;
+        la position de trésorerie part des réserves initiales. La ligne de crédit est le
+        quantile `alpha` du découvert maximal sous le plancher `floor` (M€).
+        """
+        years = ensemble['annees']
+        calendar = self._build_calendar(years)
+        profiles = self._cash_profiles(calendar)
+        index = {m: j for j, m in enumerate(ensemble['metriques'])}
+        values = ensemble['valeurs']
+        n_scenarios, n_years = values.shape[:2]
+        
+        # Flux nets (S, T, 4) : revenus encaissés moins dépenses décaissées
+        flows = np.zeros((n_scenarios, n_years, 4))
+        for sign, components in ((1, COMPOSANTES_REVENUS), (-1, COMPOSANTES_DEPENSES)):
+            for flow in components:
+                flows += sign * values[:, :, index[flow], None] * profiles[flow]
+        flows = flows.reshape(n_scenarios, n_years * 4)
+        
+        opening = self.config["reserves_base"] if opening is None else opening
+        position = opening + np.cumsum(flows, axis=1)
+        lowest = position.argmin(axis=1)
+        minimum = position[np.arange(n_scenarios), lowest]
+        shortfall = np.maximum(floor - minimum, 0)
+        
+        periods = np.array([f"{y}T{q}" for y in years for q in range(1, 5)])
+        weights = np.exp(ensemble['log_poids'] - ensemble['log_poids'].max())
+        credit_line = self._weighted_var_es(shortfall, weights, alpha)[0]
+        
+        result = {
+            'periodes': periods,
+            'flux': flows,
+            'tresorerie': position,
+            'minimum': minimum,
+            'periode_minimum': periods[lowest],
+            'minimum_annuel': position.reshape(n_scenarios, n_years, 4).min(axis=2),
+            'probabilite_decouvert': np.average(minimum < floor, weights=weights),
+            'ligne_credit': credit_line,
+        }
+        
+        print(f"💶 Trésorerie trimestrielle ({n_scenarios} scénarios)")
+        print(f"Probabilité de passer sous {floor:.1f} M€: {result['probabilite_decouvert']:.1%}")
+        print(f"Ligne de crédit ({alpha:.0%}): {credit_line:.2f} M€")
+        print(f"Point bas le plus fréquent: {pd.Series(result['periode_minimum']).mode()[0]}")
+        return result
+    
+    def _generate_chunk(self, n_scenarios, seed, k, metrics=None):
+        """Génère le paquet k avec sa graine dérivée (indépendante de l'ordre d'exécution)"""
+        previous_rng, previous_n = self.rng, self.n_scenarios
+        try:
+            self.rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(k,)))
+            return self.generate_ensemble(n_scenarios, metrics=metrics)
+        finally:
+            self.rng, self.n_scenarios = previous_rng, previous_n
+    
+    def _chunk_layout(self, n_scenarios, chunk_size):
+        """Tailles des paquets et numéro du premier scénario de chacun"""
+        sizes = [min(chunk_size, n_scenarios - s) for s in range(0, n_scenarios, chunk_size)]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(int)
+        return sizes, offsets
+    
+    def iter_ensemble(self, n_scenarios, chunk_size=10000, seed=0):
+        """Génère un ensemble par paquets reproductibles (une graine dérivée par paquet)"""
+        for k, size in enumerate(self._chunk_layout(n_scenarios, chunk_size)[0]):
+            yield self._generate_chunk(size, seed, k)
+    
+    def _iter_chunks(self, run, chunk_size):
+        """Paquets d'une exécution : ensemble en mémoire ou itérable de paquets"""
+        if isinstance(run, dict):
+            for start in range(0, len(run['valeurs']), chunk_size):
+                yield self.select_scenarios(run, slice(start, start + chunk_size))
+        else:
+            yield from run
+    
+    def _merge_moments(self, moments, values):
+        """Fusionne les moments (effectif, moyenne, M2) d'un paquet, formule de Chan"""
+        count, mean, m2 = moments
+        n = len(values)
+        chunk_mean = values.mean(axis=0)
+        chunk_m2 = ((values - chunk_mean) ** 2).sum(axis=0)
+        delta = chunk_mean - mean
+        total = count + n
+        return (total, mean + delta * n / total,
+                m2 + chunk_m2 + delta ** 2 * count * n / total)
+    
+    def diff_runs(self, base, other, tolerance=1e-9, chunk_size=10000):
+        """Compare deux exécutions appariées (mêmes graines) en un seul passage par paquets
+        
+        base, other : ensembles ou itérables de paquets (par exemple iter_ensemble).
+        Renvoie, par métrique et par année, les écarts moyens appariés et le déplacement
+        des distributions.
+        """
+        moments = None
+        for chunk_base, chunk_other in zip_longest(self._iter_chunks(base, chunk_size),
+                                                   self._iter_chunks(other, chunk_size)):
+            if chunk_base is None or chunk_other is None:
+                raise ValueError("Exécutions non appariées : nombres de scénarios différents")
+            before, after = chunk_base['valeurs'], chunk_other['valeurs']
+            if before.shape != after.shape:
+                raise ValueError("Exécutions non appariées : dimensions différentes")
             
-            # Participation au gouvernement (2012-2016)
-            if 2012 <= year <= 2016:
-                df.loc[i, 'Revenus_Total'] *= 1.15
-                df.loc[i, 'Depenses_Personnel'] *= 1.10
+            if moments is None:
+                zero = (0, np.zeros(before.shape[1:]), np.zeros(before.shape[1:]))
+                moments = {'base': zero, 'autre': zero, 'delta': zero,
+                           'modifies': np.zeros(before.shape[1:])}
+                years, metrics = chunk_base['annees'], chunk_base['metriques']
             
-            # Alliance avec LREM (2017)
-            if year == 2017:
-                df.loc[i, 'Revenus_Total'] *= 1.4
-                df.loc[i, 'Financement_Public'] *= 1.6
-                df.loc[i, 'Elus_Nationaux'] *= 4.5
-                df.loc[i, 'Adherents'] *= 1.2
+            delta = after - before
+            moments['base'] = self._merge_moments(moments['base'], before)
+            moments['autre'] = self._merge_moments(moments['autre'], after)
+            moments['delta'] = self._merge_moments(moments['delta'], delta)
+            moments['modifies'] += (np.abs(delta) > tolerance).sum(axis=0)
+        
+        count, mean_base, m2_base = moments['base']
+        _, mean_other, m2_other = moments['autre']
+        _, mean_delta, m2_delta = moments['delta']
+        std_base = np.sqrt(m2_base / count)
+        std_other = np.sqrt(m2_other / count)
+        
+        # Échelle de référence : écart-type de base, ou niveau pour une série déterministe
+        reference = np.where(std_base > 0, std_base, np.maximum(np.abs(mean_base), 1e-12))
+        
+        index = pd.MultiIndex.from_product([metrics, years], names=['Metrique', 'Annee'])
+        def column(values):
+            return values.T.ravel()
+        
+        return pd.DataFrame({
+            'Moyenne_Base': column(mean_base),
+            'Moyenne_Comparee': column(mean_other),
+            'Delta_Moyen': column(mean_delta),
+            'Delta_Ecart_Type': column(np.sqrt(m2_delta / count)),
+            'Ecart_Standardise': column(mean_delta / reference),
+            'Rapport_Ecarts_Types': column(np.divide(std_other, std_base, out=np.ones_like(std_base),
+                                                     where=std_base > 0)),
+            'Part_Scenarios_Modifies': column(moments['modifies'] / count),
+        }, index=index)
+    
+    def _parameter_changes(self, other):
+        """Paramètres qui diffèrent entre ce modèle et `other`"""
+        changes = []
+        for metric in sorted(set(self.profile) | set(other.profile)):
+            before, after = self.profile.get(metric, {}), other.profile.get(metric, {})
+            for key in sorted(set(before) | set(after)):
+                if before.get(key) != after.get(key):
+                    changes.append((('profile', metric, key), before.get(key), after.get(key)))
+        for key in sorted(set(self.config) | set(other.config)):
+            if self.config.get(key) != other.config.get(key):
+                changes.append((('config', key), self.config.get(key), other.config.get(key)))
+        for attribute in ('ledger', 'noise_model'):
+            if getattr(self, attribute) != getattr(other, attribute):
+                changes.append(((attribute,), getattr(self, attribute), getattr(other, attribute)))
+        return changes
+    
+    def _with_parameter(self, path, value):
+        """Copie du modèle avec un seul paramètre modifié"""
+        variant = copy.copy(self)
+        variant.profile = copy.deepcopy(self.profile)
+        variant.config = copy.deepcopy(self.config)
+        
+        if path[0] == 'profile':
+            params = variant.profile.setdefault(path[1], {})
+            if value is None:
+                params.pop(path[2], None)
+            else:
+                params[path[2]] = value
+        elif path[0] == 'config':
+            variant.config[path[1]] = value
+        else:
+            setattr(variant, path[0], value)
+        return variant
+    
+    def attribute_changes(self, other, n_scenarios=10000, seed=0, chunk_size=10000):
+        """Attribue l'écart entre ce modèle et `other` à chaque paramètre modifié
+        
+        Chaque paramètre est appliqué seul au modèle de base, à graines identiques ;
+        l'impact est la somme des écarts standardisés absolus sur toutes les métriques
+        et années. Le résidu mesure les interactions entre paramètres.
+        """
+        if (self.start_year, self.end_year) != (other.start_year, other.end_year):
+            raise ValueError("Périodes de simulation différentes : exécutions non appariées")
+        
+        changes = self._parameter_changes(other)
+        total = self.diff_runs(self.iter_ensemble(n_scenarios, chunk_size, seed),
+                               other.iter_ensemble(n_scenarios, chunk_size, seed))
+        total_impact = total['Ecart_Standardise'].abs().sum()
+        
+        rows = []
+        for path, before, after in changes:
+            variant = self._with_parameter(path, after)
+            diff = self.diff_runs(self.iter_ensemble(n_scenarios, chunk_size, seed),
+                                  variant.iter_ensemble(n_scenarios, chunk_size, seed))
+            impact = diff['Ecart_Standardise'].abs()
+            metric, year = impact.idxmax()
+            rows.append({
+                'Parametre': '.'.join(str(p) for p in path),
+                'Ancienne_Valeur': before,
+                'Nouvelle_Valeur': after,
+                'Impact': impact.sum(),
+                'Part_Impact': impact.sum() / total_impact if total_impact > 0 else 0.0,
+                'Metrique_Principale': metric,
+                'Annee_Principale': year,
+            })
+        
+        attribution = pd.DataFrame(rows, columns=['Parametre', 'Ancienne_Valeur', 'Nouvelle_Valeur',
+                                                  'Impact', 'Part_Impact', 'Metrique_Principale',
+                                                  'Annee_Principale'])
+        attribution = attribution.sort_values('Impact', ascending=False, ignore_index=True)
+        
+        print(f"🔍 ATTRIBUTION DES ÉCARTS ({len(changes)} paramètres modifiés)")
+        for row in attribution.itertuples():
+            print(f"• {row.Parametre}: {row.Part_Impact:.1%} de l'impact "
+                  f"(surtout {row.Metrique_Principale} {row.Annee_Principale})")
+        interactions = total_impact - attribution['Impact'].sum()
+        print(f"Interactions (résidu): {interactions / total_impact if total_impact > 0 else 0:.1%}")
+        
+        return {'ecarts': total, 'attribution': attribution, 'impact_total': total_impact}
+    
+    def build_scenario_index(self, ensemble, keys=None):
+        """Construit un index trié par couple (métrique, année) pour les requêtes sur scénarios"""
+        if keys is None:
+            keys = [(m, int(y)) for m in METRIQUES_INDEXEES for y in ensemble['annees']]
+        
+        years = ensemble['annees'].tolist()
+        columns = [ensemble['valeurs'][:, years.index(y), ensemble['metriques'].index(m)]
+                   for m, y in keys]
+        orders = np.array([np.argsort(c, kind='stable') for c in columns], dtype=np.uint32)
+        
+        return {
+            'cles': [(m, int(y)) for m, y in keys],
+            'ordres': orders,
+            'valeurs_triees': np.take_along_axis(np.array(columns), orders.astype(np.intp), axis=1),
+            'n_scenarios': ensemble['valeurs'].shape[0],
+        }
+    
+    def _resolve_index_keys(self, index_keys):
+        """Clés d'index demandées : True pour les séries par défaut, sinon une liste non vide"""
+        if index_keys is True:
+            return None
+        if not index_keys:
+            raise ValueError("index_keys attend True ou une liste non vide de couples (métrique, année)")
+        return list(index_keys)
+    
+    def _merge_scenario_indexes(self, parts, offsets):
+        """Fusionne les index de paquets successifs en un index de tout l'ensemble
+        
+        Le tri stable garde, à valeur égale, les scénarios dans l'ordre croissant :
+        le résultat est identique à build_scenario_index sur l'ensemble complet.
+        """
+        values = np.concatenate([part['valeurs_triees'] for part in parts], axis=1)
+        scenarios = np.concatenate([part['ordres'].astype(np.int64) + offset
+                                    for part, offset in zip(parts, offsets)], axis=1)
+        merge = np.argsort(values, axis=1, kind='stable')
+        
+        return {
+            'cles': parts[0]['cles'],
+            'ordres': np.take_along_axis(scenarios, merge, axis=1).astype(np.uint32),
+            'valeurs_triees': np.take_along_axis(values, merge, axis=1),
+            'n_scenarios': sum(part['n_scenarios'] for part in parts),
+        }
+    
+    def save_scenario_index(self, index, output_file):
+        """Sauvegarde un index de scénarios (npz)"""
+        np.savez(output_file,
+                 cles=np.array([f'{m}|{y}' for m, y in index['cles']], dtype=str),
+                 ordres=index['ordres'], valeurs_triees=index['valeurs_triees'],
+                 n_scenarios=index['n_scenarios'])
+        print(f"🗂️ Index de scénarios sauvegardé: {output_file}")
+    
+    def load_scenario_index(self, path):
+        """Charge un index de scénarios sauvegardé"""
+        with np.load(path, allow_pickle=False) as saved:
+            keys = [key.split('|') for key in saved['cles'].tolist()]
+            return {
+                'cles': [(m, int(y)) for m, y in keys],
+                'ordres': saved['ordres'],
+                'valeurs_triees': saved['valeurs_triees'],
+                'n_scenarios': int(saved['n_scenarios']),
+            }
+    
+    def query_scenarios(self, index, predicates):
+        """Identifiants des scénarios vérifiant tous les prédicats
+        
+        predicates : texte 'Reserves_Financieres[2022] < 1 & Dependance_Financement_Public[2025] > 0.4'
+        ou liste de tuples (métrique, année, opérateur, valeur).
+        """
+        if isinstance(predicates, str):
+            predicates = [self._parse_predicate(p) for p in predicates.split('&')]
+        
+        bitmap = None
+        for metric, year, operator, value in predicates:
+            selected = self._predicate_bitmap(index, metric, int(year), operator, float(value))
+            bitmap = selected if bitmap is None else np.bitwise_and(bitmap, selected)
+        
+        matches = np.unpackbits(bitmap, count=index['n_scenarios']).astype(bool)
+        return np.flatnonzero(matches)
+    
+    def _parse_predicate(self, text):
+        """Décompose un prédicat textuel Metrique[annee] op valeur"""
+        match = MOTIF_PREDICAT.match(text)
+        if not match:
+            raise ValueError(f"Prédicat invalide: {text.strip()}")
+        metric, year, operator, value = match.groups()
+        return metric, int(year), operator, float(value)
+    
+    def _predicate_bitmap(self, index, metric, year, operator, value):
+        """Bitmap compressée (bits empaquetés) des scénarios vérifiant un prédicat"""
+        try:
+            row = index['cles'].index((metric, year))
+        except ValueError:
+            raise ValueError(f"Aucun index pour {metric} en {year}")
+        
+        # Recherche dichotomique dans les valeurs triées : une plage contiguë de l'ordre
+        ordered = index['valeurs_triees'][row]
+        if operator == '<':
+            start, stop = 0, np.searchsorted(ordered, value, side='left')
+        elif operator == '<=':
+            start, stop = 0, np.searchsorted(ordered, value, side='right')
+        elif operator == '>':
+            start, stop = np.searchsorted(ordered, value, side='right'), len(ordered)
+        elif operator == '>=':
+            start, stop = np.searchsorted(ordered, value, side='left'), len(ordered)
+        elif operator == '==':
+            start = np.searchsorted(ordered, value, side='left')
+            stop = np.searchsorted(ordered, value, side='right')
+        else:
+            raise ValueError(f"Opérateur inconnu: {operator}")
+        
+        selected = np.zeros(index['n_scenarios'], dtype=bool)
+        selected[index['ordres'][row, start:stop]] = True
+        return np.packbits(selected)
+    
+    def select_scenarios(self, ensemble, scenarios):
+        """Sous-ensemble restreint aux scénarios donnés"""
+        subset = dict(ensemble)
+        subset['valeurs'] = ensemble['valeurs'][scenarios]
+        subset['log_poids'] = ensemble['log_poids'][scenarios]
+        subset['innovations'] = {m: z[scenarios] for m, z in ensemble['innovations'].items()}
+        return subset
+    
+    def summary_frame(self, ensemble, scenarios=None):
+        """Moyenne par année sur les scénarios (tous ou une sélection), au schéma d'une trajectoire"""
+        if scenarios is not None:
+            ensemble = self.select_scenarios(ensemble, scenarios)
+        df = pd.DataFrame(ensemble['valeurs'].mean(axis=0), columns=ensemble['metriques'])
+        df.insert(0, 'Annee', ensemble['annees'])
+        return df
+    
+    def _parse_indicator(self, name):
+        """Type et série de base d'un indicateur dérivé"""
+        if name in INDICATEURS_DERIVES:
+            return 'ratio', name
+        if name.startswith(PREFIXE_CROISSANCE):
+            return 'croissance', name[len(PREFIXE_CROISSANCE):]
+        if name.startswith(PREFIXE_MOYENNE_MOBILE):
+            return 'moyenne_mobile', name[len(PREFIXE_MOYENNE_MOBILE):]
+        raise KeyError(f"Indicateur inconnu: {name}")
+    
+    def indicator_label(self, name):
+        """Libellé et unité d'une statistique d'insights ou d'un indicateur dérivé"""
+        if name in LIBELLES_INSIGHTS:
+            return LIBELLES_INSIGHTS[name]
+        kind, target = self._parse_indicator(name)
+        label, unit = INDICATEURS_DERIVES[target][3:] if target in INDICATEURS_DERIVES else (target, "")
+        if kind == 'croissance':
+            return f"Croissance annuelle - {label}", "%"
+        if kind == 'moyenne_mobile':
+            return f"Moyenne mobile {FENETRE_MOYENNE_MOBILE} ans - {label}", unit
+        return label, unit
+    
+    def derive_indicators(self, ensemble, names=None, append=False):
+        """Calcule des indicateurs dérivés sur le tenseur (scénario, année, métrique)
+        
+        Chaque famille est calculée en une passe sur les séries empilées : sommes de postes
+        partagées, une division pour tous les ratios, un décalage pour les glissements
+        annuels, une somme cumulée pour les moyennes mobiles. Avec append=True, les
+        indicateurs remplacent ou complètent les métriques de l'ensemble.
+        """
+        names = list(INDICATEURS_DERIVES) if names is None else list(names)
+        values = ensemble['valeurs']
+        index = {m: j for j, m in enumerate(ensemble['metriques'])}
+        parsed = [self._parse_indicator(name) for name in names]
+        
+        # Ratios demandés, directement ou comme base d'un glissement / d'une moyenne mobile
+        ratios = list(dict.fromkeys(target for _, target in parsed if target in INDICATEURS_DERIVES))
+        totals = {}
+        def total(components):
+            key = tuple(components)
+            if key not in totals:
+                totals[key] = values[:, :, [index[c] for c in components]].sum(axis=2)
+            return totals[key]
+        
+        series = {}
+        if ratios:
+            numerators = np.stack([total(INDICATEURS_DERIVES[r][0]) for r in ratios], axis=-1)
+            denominators = np.stack([total(INDICATEURS_DERIVES[r][1]) for r in ratios], axis=-1)
+            factors = np.array([INDICATEURS_DERIVES[r][2] for r in ratios])
+            quotient = np.divide(numerators, denominators, out=np.full(numerators.shape, np.nan),
+                                 where=denominators != 0) * factors
+            series.update({r: quotient[..., k] for k, r in enumerate(ratios)})
+        
+        def gather(targets):
+            missing = [t for t in targets if t not in series and t not in index]
+            if missing:
+                raise KeyError(f"Séries absentes de l'ensemble: {missing}")
+            return np.stack([series[t] if t in series else values[:, :, index[t]] for t in targets],
+                            axis=-1)
+        
+        growth = list(dict.fromkeys(t for kind, t in parsed if kind == 'croissance'))
+        if growth:
+            stacked = gather(growth)
+            rate = np.full(stacked.shape, np.nan)
+            np.divide(stacked[:, 1:], stacked[:, :-1], out=rate[:, 1:], where=stacked[:, :-1] != 0)
+            rate[:, 1:] -= 1
+            series.update({PREFIXE_CROISSANCE + t: rate[..., k] for k, t in enumerate(growth)})
+        
+        rolling = list(dict.fromkeys(t for kind, t in parsed if kind == 'moyenne_mobile'))
+        if rolling:
+            # Fenêtre partielle en début de période (comme rolling(min_periods=1))
+            window = FENETRE_MOYENNE_MOBILE
+            cumulative = np.cumsum(gather(rolling), axis=1)
+            sums = cumulative.copy()
+            sums[:, window:] -= cumulative[:, :-window]
+            counts = np.minimum(np.arange(1, cumulative.shape[1] + 1), window)[None, :, None]
+            mean = sums / counts
+            series.update({PREFIXE_MOYENNE_MOBILE + t: mean[..., k] for k, t in enumerate(rolling)})
+        
+        derived = np.stack([series[name] for name in names], axis=-1)
+        if append:
+            metrics = list(ensemble['metriques'])
+            merged = values.copy()
+            replaced = [name for name in names if name in index]
+            if replaced:
+                merged[:, :, [index[n] for n in replaced]] = derived[:, :, [names.index(n) for n in replaced]]
+            added = [k for k, name in enumerate(names) if name not in index]
+            metrics += [names[k] for k in added]
+            derived = np.concatenate([merged, derived[:, :, added]], axis=2)
+            names = metrics
+        
+        return dict(ensemble, metriques=names, valeurs=derived)
+    
+    def plot_indicators(self, ensemble, names, output_file='Modem_indicateurs.png'):
+        """Trace les indicateurs choisis : moyenne et bande 5-95 % sur les scénarios"""
+        derived = self.derive_indicators(ensemble, names)
+        years = derived['annees']
+        n_cols = min(len(names), 2)
+        n_rows = -(-len(names) // n_cols)
+        fig, axes = plt.subplots(n_rows, n_cols, figsize=(10 * n_cols, 5 * n_rows), squeeze=False)
+        
+        for k, (name, ax) in enumerate(zip(names, axes.ravel())):
+            label, unit = self.indicator_label(name)
+            values = derived['valeurs'][:, :, k] * (100 if unit == "%" else 1)
+            color = self.colors[k % len(self.colors)]
+            ax.plot(years, np.nanmean(values, axis=0), linewidth=2, color=color, label='Moyenne')
+            if len(values) > 1:
+                low, high = np.nanpercentile(values, [5, 95], axis=0)
+                ax.fill_between(years, low, high, color=color, alpha=0.2, label='5-95 %')
+            ax.set_title(f'{label} ({unit})' if unit else label, fontsize=12, fontweight='bold')
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+        for ax in axes.ravel()[len(names):]:
+            ax.set_visible(False)
+        
+        plt.tight_layout()
+        plt.savefig(output_file, dpi=150, bbox_inches='tight')
+        plt.show()
+    
+    def aggregate_ensemble(self, ensemble, aggregates=None):
+        """Fusionne les scénarios d'un ensemble dans les agrégats par métrique et par année
+        
+        Effectif, moyenne, M2, minimum, maximum et évolution moyenne première → dernière
+        année : tous fusionnables, si bien qu'un ajout de scénarios ne relit pas les anciens.
+        """
+        values = ensemble['valeurs']
+        if aggregates is None:
+            shape = values.shape[1:]
+            aggregates = {
+                'annees': np.asarray(ensemble['annees']),
+                'metriques': list(ensemble['metriques']),
+                'effectif': 0,
+                'moyenne': np.zeros(shape),
+                'm2': np.zeros(shape),
+                'minimum': np.full(shape, np.inf),
+                'maximum': np.full(shape, -np.inf),
+                'evolution': np.zeros(shape[1]),
+            }
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            evolution = (values[:, -1, :] / values[:, 0, :] - 1).mean(axis=0)
+        count, mean, m2 = self._merge_moments((aggregates['effectif'], aggregates['moyenne'],
+                                               aggregates['m2']), values)
+        return dict(aggregates, effectif=count, moyenne=mean, m2=m2,
+                    minimum=np.minimum(aggregates['minimum'], values.min(axis=0)),
+                    maximum=np.maximum(aggregates['maximum'], values.max(axis=0)),
+                    evolution=aggregates['evolution']
+                    + (evolution - aggregates['evolution']) * len(values) / count)
+    
+    def _parameter_signatures(self):
+        """Empreintes des paramètres : une globale, une par métrique"""
+        def digest(value):
+            return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+        noisy = sorted(m for m in METRIQUES if self.profile[m]['bruit'] > 0)
+        signatures = {metric: digest(self.profile[metric]) for metric in METRIQUES}
+        # Mode, bruit corrélé et configuration touchent toutes les métriques, de même que
+        # l'ensemble des séries bruitées quand le bruit corrélé mêle leurs innovations
+        signatures['*'] = digest((self.ledger, self.noise_model, self.config, self.start_year,
+                                  self.end_year, noisy if self.noise_model else None))
+        return signatures
+    
+    def _affected_metrics(self, changed):
+        """Métriques à recalculer quand les paramètres de `changed` changent"""
+        affected = set(changed)
+        if self.ledger:
+            # Postes recalés sur le budget et le solde modélisés (_anchor_ledger) : le
+            # facteur de recalage d'un côté dépend de tous les postes de ce côté
+            if affected & {'Revenus_Total', 'Solde_Financier'}:
+                affected |= set(COMPOSANTES_REVENUS + COMPOSANTES_DEPENSES)
+            for components in (COMPOSANTES_REVENUS, COMPOSANTES_DEPENSES):
+                if affected & set(components):
+                    affected |= set(components)
+        if self.ledger and affected & set(COMPOSANTES_REVENUS + COMPOSANTES_DEPENSES):
+            affected |= set(SERIES_COMPTABLES)
+        return [m for m in METRIQUES if m in affected]
+    
+    def materialize_aggregates(self, n_scenarios, chunk_size=10000, seed=None,
+                               aggregates_file='Modem_agregats.npz'):
+        """Génère un ensemble par paquets et n'en conserve que les agrégats (quelques Ko)
+        
+        La recette (graine, paquets, empreintes des paramètres) est conservée avec les
+        agrégats pour les mises à jour incrémentales de refresh_aggregates.
+        """
+        entropy = np.random.SeedSequence(seed).entropy
+        sizes = self._chunk_layout(n_scenarios, chunk_size)[0]
+        aggregates = None
+        for k, size in enumerate(sizes):
+            aggregates = self.aggregate_ensemble(self._generate_chunk(size, entropy, k), aggregates)
+        
+        aggregates.update(graine=str(entropy), taille_paquet=chunk_size, paquets=sizes,
+                          signatures=self._parameter_signatures())
+        if aggregates_file:
+            self.save_aggregates(aggregates, aggregates_file)
+        return aggregates
+    
+    def refresh_aggregates(self, aggregates, n_scenarios=None):
+        """Met à jour les agrégats : métriques touchées par un changement de paramètres,
+        puis scénarios ajoutés jusqu'à `n_scenarios`
+        """
+        current = self._parameter_signatures()
+        stored = aggregates['signatures']
+        if current['*'] != stored['*']:
+            affected = list(aggregates['metriques'])
+        else:
+            affected = self._affected_metrics([m for m in METRIQUES if current[m] != stored.get(m)])
+        entropy = int(aggregates['graine'])
+        sizes = list(aggregates['paquets'])
+        
+        if affected:
+            # Mêmes graines par paquet : seules les métriques touchées sont simulées et réagrégées
+            columns = [aggregates['metriques'].index(m) for m in affected]
+            partial = None
+            for k, size in enumerate(sizes):
+                partial = self.aggregate_ensemble(self._generate_chunk(size, entropy, k, affected),
+                                                  partial)
+            aggregates = dict(aggregates)
+            for key in ('moyenne', 'm2', 'minimum', 'maximum', 'evolution'):
+                aggregates[key] = aggregates[key].copy()
+                aggregates[key][..., columns] = partial[key]
+        
+        added = 0
+        if n_scenarios is not None and n_scenarios > aggregates['effectif']:
+            remaining = n_scenarios - aggregates['effectif']
+            while added < remaining:
+                size = min(aggregates['taille_paquet'], remaining - added)
+                aggregates = self.aggregate_ensemble(self._generate_chunk(size, entropy, len(sizes)),
+                                                     aggregates)
+                sizes.append(size)
+                added += size
+        
+        aggregates = dict(aggregates, paquets=sizes, signatures=current)
+        print(f"♻️ Agrégats mis à jour: {len(affected)} métriques recalculées, "
+              f"{added} scénarios ajoutés ({aggregates['effectif']} au total)")
+        return aggregates
+    
+    def save_aggregates(self, aggregates, output_file):
+        """Sauvegarde les agrégats et leur recette (.npz)"""
+        recipe = {key: aggregates[key] for key in ('graine', 'taille_paquet', 'paquets', 'signatures',
+                                                   'metriques', 'effectif') if key in aggregates}
+        np.savez(output_file, recette=json.dumps(recipe),
+                 **{key: aggregates[key] for key in CLES_AGREGATS})
+    
+    def load_aggregates(self, input_file):
+        """Charge des agrégats sauvegardés par save_aggregates"""
+        with np.load(input_file) as saved:
+            aggregates = json.loads(str(saved['recette']))
+            for key in CLES_AGREGATS:
+                aggregates[key] = saved[key]
+        return aggregates
+    
+    def summary_from_aggregates(self, aggregates):
+        """Trajectoire moyenne par année (schéma de summary_frame) à partir des agrégats"""
+        df = pd.DataFrame(aggregates['moyenne'], columns=aggregates['metriques'])
+        df.insert(0, 'Annee', aggregates['annees'])
+        return df
+    
+    def _aggregates_frame(self, aggregates):
+        """Agrégats par métrique et par année sous forme de DataFrame (Metrique, Annee)"""
+        index = pd.MultiIndex.from_product([aggregates['metriques'], aggregates['annees']],
+                                           names=['Metrique', 'Annee'])
+        return pd.DataFrame({
+            'Moyenne': aggregates['moyenne'].T.ravel(),
+            'Ecart_Type': np.sqrt(aggregates['m2'] / aggregates['effectif']).T.ravel(),
+            'Minimum': aggregates['minimum'].T.ravel(),
+            'Maximum': aggregates['maximum'].T.ravel(),
+        }, index=index)
+    
+    def refresh_dashboard(self, aggregates_file='Modem_agregats.npz', n_scenarios=None,
+                          indicators=None):
+        """Rafraîchit le tableau de bord depuis les agrégats matérialisés, mis à jour au besoin"""
+        aggregates = self.refresh_aggregates(self.load_aggregates(aggregates_file), n_scenarios)
+        self.save_aggregates(aggregates, aggregates_file)
+        self.create_financial_analysis(self.summary_from_aggregates(aggregates), indicators=indicators,
+                                       stats=self.insights_from_aggregates(aggregates, indicators))
+        return aggregates
+    
+    def export_excel(self, ensemble, output_file, chunk_size=1000, index_keys=None):
+        """Exporte données, insights et résumé par scénario en classeur Excel (mode streaming)
+        
+        index_keys : True (séries de METRIQUES_INDEXEES) ou couples (métrique, année) à
+        indexer pour les requêtes sur scénarios ; l'index est alors écrit à côté du
+        classeur (<fichier>.index.npz). Par défaut (None), pas d'index.
+        """
+        keys = self._resolve_index_keys(index_keys) if index_keys is not None else None
+        workbook = openpyxl.Workbook(write_only=True)
+        
+        self._write_data_sheets(workbook, ensemble, chunk_size)
+        self._write_insights_sheet(workbook, ensemble)
+        self._write_scenarios_sheet(workbook, ensemble, chunk_size)
+        
+        workbook.save(output_file)
+        print(f"📗 Classeur Excel sauvegardé: {output_file}")
+        
+        if index_keys is not None:
+            index = self.build_scenario_index(ensemble, keys)
+            self.save_scenario_index(index, f'{output_file}.index.npz')
+    
+    def _typed_row(self, sheet, formats):
+        """Prépare une ligne de cellules typées, réutilisée pour chaque ligne écrite"""
+        cells = [WriteOnlyCell(sheet) for _ in formats]
+        for cell, number_format in zip(cells, formats):
+            if number_format:
+                cell.number_format = number_format
+        return cells
+    
+    def _write_data_sheets(self, workbook, ensemble, chunk_size):
+        """Écrit les données ligne à ligne, par paquets de scénarios"""
+        values = ensemble['valeurs']
+        metrics = ensemble['metriques']
+        years = ensemble['annees'].tolist()
+        n_scenarios, n_years, n_metrics = values.shape
+        
+        formats = [FORMAT_EFFECTIF, None]
+        for metric in metrics:
+            if metric in COLONNES_TAUX:
+                formats.append(FORMAT_TAUX)
+            elif metric in COLONNES_EFFECTIFS:
+                formats.append(FORMAT_EFFECTIF)
+            else:
+                formats.append(FORMAT_MONTANT)
+        
+        # Un scénario n'est jamais coupé entre deux feuilles
+        scenarios_per_sheet = (EXCEL_MAX_LIGNES - 1) // n_years
+        sheet = None
+        
+        for start in range(0, n_scenarios, chunk_size):
+            block = values[start:start + chunk_size].tolist()
             
-            # Européennes 2019
-            if year == 2019:
-                df.loc[i, 'Elus_Europeens'] = 6
-                df.loc[i, 'Investissement_Europe'] *= 1.5
+            for offset, rows in enumerate(block):
+                scenario = start + offset
+                if scenario % scenarios_per_sheet == 0:
+                    number = scenario // scenarios_per_sheet + 1
+                    sheet = workbook.create_sheet('Donnees' if number == 1 else f'Donnees_{number}')
+                    sheet.append(['Scenario', 'Annee'] + metrics)
+                    cells = self._typed_row(sheet, formats)
+                
+                for year, row in zip(years, rows):
+                    for cell, value in zip(cells, [scenario, year] + row):
+                        cell.value = value
+                    sheet.append(cells)
+    
+    def _write_insights_sheet(self, workbook, ensemble):
+        """Écrit les statistiques des insights"""
+        sheet = workbook.create_sheet('Insights')
+        sheet.append(['Indicateur', 'Valeur', 'Unité'])
+        cells = self._typed_row(sheet, [None, '0.00', None])
+        
+        for key, value in self.compute_insight_statistics(ensemble).items():
+            label, unit = self.indicator_label(key)
+            for cell, item in zip(cells, (label, float(value), unit)):
+                cell.value = item
+            sheet.append(cells)
+    
+    def _write_scenarios_sheet(self, workbook, ensemble, chunk_size):
+        """Écrit une ligne de synthèse par scénario, par paquets de scénarios"""
+        values = ensemble['valeurs']
+        columns = {m: j for j, m in enumerate(ensemble['metriques'])}
+        
+        sheet = workbook.create_sheet('Scenarios')
+        sheet.append(['Scenario', 'Revenus_Moyens', 'Depenses_Moyennes', 'Solde_Moyen',
+                      'Reserves_Finales', 'Reserves_Minimales', 'Annee_Reserves_Minimales'])
+        cells = self._typed_row(sheet, [FORMAT_EFFECTIF, FORMAT_MONTANT, FORMAT_MONTANT, FORMAT_TAUX,
+                                        FORMAT_MONTANT, FORMAT_MONTANT, '0'])
+        
+        for start in range(0, len(values), chunk_size):
+            block = values[start:start + chunk_size]
+            reserves = block[:, :, columns['Reserves_Financieres']]
+            summary = zip(
+                range(start, start + len(block)),
+                block[:, :, columns['Revenus_Total']].mean(axis=1).tolist(),
+                block[:, :, columns['Depenses_Total']].mean(axis=1).tolist(),
+                block[:, :, columns['Solde_Financier']].mean(axis=1).tolist(),
+                reserves[:, -1].tolist(),
+                reserves.min(axis=1).tolist(),
+                ensemble['annees'][reserves.argmin(axis=1)].tolist(),
+            )
             
-            # Réélection 2022
-            if year == 2022:
-                df.loc[i, 'Depenses_Campagnes'] *= 1.8
-                df.loc[i, 'Dons_Prives'] *= 1.4
+            for row in summary:
+                for cell, value in zip(cells, row):
+                    cell.value = value
+                sheet.append(cells)
+    
+    def load_filings(self, path, mapping=None, party=None, scale=1e-6, chunksize=50000,
+                     sheet=None, cache_dir='.modem_cache', **read_options):
+        """Charge des comptes publiés (CSV/XLSX/XLS) au schéma de generate_financial_data"""
+        mapping = self._filing_mapping(mapping)
+        
+        stat = os.stat(path)
+        key = hashlib.sha1(repr((VERSION_CACHE_COMPTES, os.path.abspath(path), stat.st_size,
+                                 stat.st_mtime_ns, sorted(mapping.items()), party, scale, sheet,
+                                 sorted(read_options.items()))).encode()).hexdigest()
+        cache_file = os.path.join(cache_dir, f'comptes_{key}.npz') if cache_dir else None
+        
+        # Format colonnaire en cache : une entrée par colonne, sans réanalyse du tableur
+        if cache_file and os.path.exists(cache_file):
+            with np.load(cache_file, allow_pickle=False) as cached:
+                columns = cached['__colonnes__'].tolist()
+                return pd.DataFrame({c: cached[c] for c in columns})
+        
+        print(f"📥 Lecture des comptes publiés: {path}...")
+        partials = []
+        for chunk in self._iter_filing_chunks(path, chunksize, sheet, read_options):
+            partials.append(self._map_filing_chunk(chunk, mapping, party, scale))
+        
+        df = pd.concat(partials).groupby('Annee', as_index=False).sum(min_count=1)
+        
+        # Taux : moyenne des valeurs publiées (sommes et effectifs cumulés par paquet)
+        for column in COLONNES_TAUX:
+            if column in df:
+                df[column] = df[column] / df.pop(f'{column}__n').replace(0, np.nan)
+        result = df.pop('Resultat_Exercice') if 'Resultat_Exercice' in df else None
+        df = df.reindex(columns=['Annee'] + METRIQUES)
+        
+        # Totaux absents des extraits : reconstitués à partir des postes
+        for total, components in (('Revenus_Total', COMPOSANTES_REVENUS),
+                                  ('Depenses_Total', COMPOSANTES_DEPENSES)):
+            if df[total].isna().all():
+                df[total] = df[components].sum(axis=1, min_count=1)
+        
+        # Résultat de l'exercice (M€) exprimé en part des revenus, comme dans le modèle
+        if result is not None:
+            df['Solde_Financier'] = df['Solde_Financier'].fillna(result / df['Revenus_Total'])
+        
+        if cache_file:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(cache_file, __colonnes__=np.array(df.columns.tolist(), dtype=str),
+                     **{c: df[c].to_numpy() for c in df.columns})
+        
+        return df
+    
+    def _filing_mapping(self, mapping):
+        """Correspondance normalisée intitulé -> colonne du modèle"""
+        combined = {self._normalize_label(m): m for m in ['Annee'] + METRIQUES}
+        combined.update(CORRESPONDANCE_COMPTES)
+        combined.update(mapping or {})
+        return {self._normalize_label(label): column for label, column in combined.items()}
+    
+    def _normalize_label(self, label):
+        """Normalise un intitulé de colonne (minuscules, sans accents ni ponctuation)"""
+        text = unicodedata.normalize('NFKD', str(label)).encode('ascii', 'ignore').decode()
+        for char in "_-'’.:()":
+            text = text.replace(char, ' ')
+        return ' '.join(text.lower().split())
+    
+    def _iter_filing_chunks(self, path, chunksize, sheet, read_options):
+        """Lit un fichier de comptes par paquets de lignes"""
+        extension = os.path.splitext(path)[1].lower()
+        
+        if extension == '.csv':
+            yield from pd.read_csv(path, chunksize=chunksize, **read_options)
+        elif extension in ('.xlsx', '.xlsm'):
+            workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            try:
+                rows = (workbook[sheet] if sheet else workbook.active).iter_rows(values_only=True)
+                header = next(rows)
+                while True:
+                    block = list(islice(rows, chunksize))
+                    if not block:
+                        break
+                    yield pd.DataFrame(block, columns=header)
+            finally:
+                workbook.close()
+        elif extension == '.xls':
+            # xlrd charge la feuille entière ; les fichiers .xls sont bornés à 65 536 lignes
+            yield pd.read_excel(path, sheet_name=sheet or 0, engine='xlrd', **read_options)
+        else:
+            raise ValueError(f"Format de fichier non pris en charge: {extension}")
+    
+    def _map_filing_chunk(self, chunk, mapping, party, scale):
+        """Projette un paquet de lignes sur le schéma du modèle, agrégé par année"""
+        targets = {}
+        for label in chunk.columns:
+            column = mapping.get(self._normalize_label(label))
+            if column:
+                targets.setdefault(column, []).append(label)
+        
+        if 'Annee' not in targets:
+            raise ValueError("Colonne d'année introuvable dans les comptes publiés")
+        
+        if party is not None and 'Parti' in targets:
+            names = chunk[targets['Parti'][0]].astype(str)
+            chunk = chunk[names.str.contains(party, case=False, regex=False)]
+        
+        mapped = pd.DataFrame({'Annee': pd.to_numeric(chunk[targets['Annee'][0]],
+                                                      errors='coerce')})
+        for column, labels in targets.items():
+            if column in ('Annee', 'Parti'):
+                continue
+            parsed = chunk[labels].apply(self._parse_amounts)
+            if column in COLONNES_TAUX:
+                # Taux : somme et effectif, moyennés par année après agrégation des paquets
+                mapped[column] = parsed.mean(axis=1)
+                mapped[f'{column}__n'] = mapped[column].notna().astype(int)
+                continue
+            values = parsed.sum(axis=1, min_count=1)
+            # Montants publiés en euros, modèle en millions d'euros
+            if column not in COLONNES_EFFECTIFS:
+                values = values * scale
+            mapped[column] = values
+        
+        mapped = mapped.dropna(subset=['Annee'])
+        mapped['Annee'] = mapped['Annee'].astype(int)
+        return mapped.groupby('Annee', as_index=False).sum(min_count=1)
+    
+    def _parse_amounts(self, values):
+        """Convertit une colonne de montants (formats français acceptés) en nombres"""
+        if values.dtype == object:
+            values = (values.astype(str)
+                      .str.replace('\u00a0', '', regex=False)
+                      .str.replace('\u202f', '', regex=False)
+                      .str.replace(' ', '', regex=False)
+                      .str.replace('€', '', regex=False)
+                      .str.replace(',', '.', regex=False))
+        return pd.to_numeric(values, errors='coerce')
     
-    def create_financial_analysis(self, df):
-        """Crée une analyse complète des finances du MoDem"""
+    def create_financial_analysis(self, df, indicators=None, stats=None):
+        """Crée une analyse complète des finances du MoDem
+        
+        indicators : indicateurs dérivés à tracer en plus et à ajouter aux insights.
+        stats : statistiques d'insights déjà calculées (par exemple depuis les agrégats).
+        """
         plt.style.use('seaborn-v0_8')
         fig = plt.figure(figsize=(20, 24))
+        self._draw_financial_figure(df, fig,
+                                    f'Analyse des Finances du {self.parti} ({self.start_year}-{self.end_year})')
+        plt.savefig(f'Modem_financial_analysis.png', dpi=300, bbox_inches='tight')
+        plt.show()
         
+        if indicators:
+            self.plot_indicators(self.frame_to_ensemble(df), indicators)
+        
+        # Générer les insights
+        self._generate_financial_insights(df, stats=stats, indicators=indicators)
+    
+    def _draw_financial_figure(self, df, fig, title):
+        """Dessine les 8 graphiques de l'analyse financière sur une figure"""
         # 1. Évolution des revenus et dépenses
-        ax1 = plt.subplot(4, 2, 1)
+        ax1 = fig.add_subplot(4, 2, 1)
         self._plot_revenue_expenses(df, ax1)
         
         # 2. Structure des revenus
-        ax2 = plt.subplot(4, 2, 2)
+        ax2 = fig.add_subplot(4, 2, 2)
         self._plot_revenue_structure(df, ax2)
         
         # 3. Structure des dépenses
-        ax3 = plt.subplot(4, 2, 3)
+        ax3 = fig.add_subplot(4, 2, 3)
         self._plot_expenses_structure(df, ax3)
         
         # 4. Adhérents et structure
-        ax4 = plt.subplot(4, 2, 4)
+        ax4 = fig.add_subplot(4, 2, 4)
         self._plot_membership_structure(df, ax4)
         
         # 5. Investissements stratégiques
-        ax5 = plt.subplot(4, 2, 5)
+        ax5 = fig.add_subplot(4, 2, 5)
         self._plot_strategic_investments(df, ax5)
         
         # 6. Indicateurs financiers
-        ax6 = plt.subplot(4, 2, 6)
+        ax6 = fig.add_subplot(4, 2, 6)
         self._plot_financial_indicators(df, ax6)
         
         # 7. Évolution des élus
-        ax7 = plt.subplot(4, 2, 7)
+        ax7 = fig.add_subplot(4, 2, 7)
         self._plot_elected_officials(df, ax7)
         
         # 8. Situation financière
-        ax8 = plt.subplot(4, 2, 8)
+        ax8 = fig.add_subplot(4, 2, 8)
         self._plot_financial_situation(df, ax8)
         
-        plt.suptitle(f'Analyse des Finances du {self.parti} ({self.start_year}-{self.end_year})', 
-                    fontsize=16, fontweight='bold')
-        plt.tight_layout()
-        plt.savefig(f'Modem_financial_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        fig.suptitle(title, fontsize=16, fontweight='bold')
+        fig.tight_layout()
+    
+    def create_report(self, runs, output_file='Modem_financial_report.pdf', scenarios=None,
+                      figsize=(11.69, 16.54), lines_per_page=70):
+        """Produit un rapport PDF paginé : une page par parti ou scénario, puis les insights
+        
+        runs : un ensemble, ou un dictionnaire {libellé (parti...): ensemble}. Chaque page
+        est écrite puis fermée aussitôt, la mémoire reste constante quel que soit le nombre
+        de pages.
+        """
+        if 'valeurs' in runs:
+            runs = {self.parti: runs}
+        
+        n_pages = 0
+        with plt.style.context('seaborn-v0_8'), PdfPages(output_file) as pdf:
+            for label, ensemble in runs.items():
+                selected = range(len(ensemble['valeurs'])) if scenarios is None else scenarios
+                for s in np.arange(len(ensemble['valeurs']))[selected]:
+                    df = self.ensemble_to_frame(self.select_scenarios(ensemble, [s]))
+                    title = f'Analyse des Finances - {label} ({self.start_year}-{self.end_year})'
+                    if len(ensemble['valeurs']) > 1:
+                        title += f' - Scénario {s}'
+                    
+                    fig = plt.figure(figsize=figsize)
+                    self._draw_financial_figure(df, fig, title)
+                    pdf.savefig(fig)
+                    plt.close(fig)
+                    n_pages += 1
+            
+            # Bloc d'insights : sortie console capturée, sans emojis (absents des polices PDF)
+            for label, ensemble in runs.items():
+                buffer = io.StringIO()
+                with contextlib.redirect_stdout(buffer):
+                    self._generate_financial_insights(
+                        None, stats=self.compute_insight_statistics(ensemble, scenarios))
+                text = ''.join(c for c in buffer.getvalue()
+                               if unicodedata.category(c) != 'So' and ord(c) <= 0xFFFF)
+                lines = text.splitlines()
+                
+                for start in range(0, len(lines), lines_per_page):
+                    fig = plt.figure(figsize=figsize)
+                    fig.text(0.05, 0.97, f'Insights - {label}', fontsize=14, fontweight='bold', va='top')
+                    fig.text(0.05, 0.94, '\n'.join(lines[start:start + lines_per_page]),
+                             family='monospace', fontsize=8, va='top')
+                    pdf.savefig(fig)
+                    plt.close(fig)
+                    n_pages += 1
+        
+        print(f"📄 Rapport PDF généré: {output_file} ({n_pages} pages)")
+        return n_pages
+    
+    def _append_chunk_csv(self, chunk, output_file, offset, header):
+        """Ajoute un paquet au CSV, scénarios numérotés à partir de `offset` ; renvoie sa taille"""
+        frame = self.ensemble_to_frame(chunk)
+        if 'Scenario' in frame.columns:
+            frame['Scenario'] += offset
+        else:
+            frame.insert(0, 'Scenario', offset)
+        with open(output_file, 'w' if header else 'a', encoding='utf-8', newline='') as f:
+            frame.to_csv(f, header=header, index=False)
+            f.flush()
+            return f.tell()
+    
+    def run_checkpointed(self, n_scenarios, chunk_size=10000, seed=None,
+                         checkpoint_file='Modem_checkpoint.npz', output_file=None,
+                         checkpoint_interval=60.0, index_keys=None):
+        """Génère un grand ensemble par paquets avec points de reprise périodiques
+        
+        Le paquet k est tiré de SeedSequence(entropie, spawn_key=(k,)) : l'état aléatoire
+        se résume à l'entropie et au prochain paquet. Le point de reprise conserve aussi les
+        agrégats partiels et la taille du CSV ; une reprise reproduit exactement le résultat
+        d'une exécution ininterrompue. Un point de reprise au plus toutes les
+        `checkpoint_interval` secondes borne le surcoût, qui est mesuré.
+        
+        index_keys (True ou couples (métrique, année), comme export_excel) : index de
+        scénarios construit paquet par paquet et écrit à côté du CSV (<fichier>.index.npz).
+        """
+        if index_keys is not None and not output_file:
+            raise ValueError("index_keys requiert un fichier de sortie (output_file)")
+        keys = self._resolve_index_keys(index_keys) if index_keys is not None else None
+        signature = hashlib.sha1(repr((n_scenarios, chunk_size, self.ledger, self.noise_model,
+                                       self.profile, self.config, self.start_year,
+                                       self.end_year)).encode()).hexdigest()
+        sizes, offsets = self._chunk_layout(n_scenarios, chunk_size)
+        first, aggregates, size, parts = 0, None, 0, []
+        
+        if os.path.exists(checkpoint_file):
+            with np.load(checkpoint_file) as saved:
+                if str(saved['signature']) != signature:
+                    raise ValueError("Point de reprise incompatible avec la configuration actuelle")
+                entropy = int(str(saved['entropie']))
+                if seed is not None and np.random.SeedSequence(seed).entropy != entropy:
+                    raise ValueError("Point de reprise obtenu avec une autre graine")
+                first = int(saved['paquets'])
+                aggregates = {key: saved[key] for key in CLES_AGREGATS}
+                aggregates.update(metriques=saved['metriques'].tolist(), effectif=int(saved['effectif']))
+                size = int(saved['octets'])
+            if output_file:
+                if not os.path.exists(output_file) or os.path.getsize(output_file) < size:
+                    raise ValueError(f"Fichier de sortie absent ou tronqué ({output_file}) : "
+                                     f"{size} octets attendus au point de reprise")
+                # Lignes écrites après le dernier point de reprise : réécrites à l'identique
+                os.truncate(output_file, size)
+            print(f"♻️ Reprise au paquet {first}/{len(sizes)} ({sum(sizes[:first])} scénarios faits)")
+        else:
+            entropy = np.random.SeedSequence(seed).entropy
+        
+        if index_keys is not None:
+            # Index des paquets déjà écrits : paquets régénérés à l'identique depuis l'entropie
+            parts = [self.build_scenario_index(self._generate_chunk(sizes[k], entropy, k), keys)
+                     for k in range(first)]
+        
+        start = last = time.perf_counter()
+        overhead, n_checkpoints = 0.0, 0
+        for k in range(first, len(sizes)):
+            chunk = self._generate_chunk(sizes[k], entropy, k)
+            aggregates = self.aggregate_ensemble(chunk, aggregates)
+            if output_file:
+                size = self._append_chunk_csv(chunk, output_file, offsets[k], header=k == 0)
+            if index_keys is not None:
+                parts.append(self.build_scenario_index(chunk, keys))
+            
+            if time.perf_counter() - last >= checkpoint_interval or k == len(sizes) - 1:
+                t = time.perf_counter()
+                if output_file:
+                    # Données sur disque avant que le point de reprise n'en enregistre la taille
+                    with open(output_file, 'a') as f:
+                        os.fsync(f.fileno())
+                self._save_checkpoint(checkpoint_file, signature=signature, entropie=str(entropy),
+                                      paquets=k + 1, octets=size, effectif=aggregates['effectif'],
+                                      metriques=np.array(aggregates['metriques'], dtype=str),
+                                      **{key: aggregates[key] for key in CLES_AGREGATS})
+                last = time.perf_counter()
+                overhead += last - t
+                n_checkpoints += 1
+        elapsed = time.perf_counter() - start
+        
+        summary = self._aggregates_frame(aggregates)
+        if index_keys is not None:
+            self.save_scenario_index(self._merge_scenario_indexes(parts, offsets),
+                                     f'{output_file}.index.npz')
+        
+        print(f"💾 {len(sizes) - first} paquets générés, {n_checkpoints} points de reprise "
+              f"(surcoût {overhead:.2f}s, {overhead / max(elapsed, 1e-9):.1%})")
+        return {'resume': summary, 'points_de_reprise': n_checkpoints,
+                'surcout': overhead, 'duree': elapsed}
+    
+    def _save_checkpoint(self, checkpoint_file, **state):
+        """Écrit le point de reprise de façon atomique (fichier temporaire puis renommage)"""
+        temporary = checkpoint_file + '.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez(f, **state)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, checkpoint_file)
+    
+    def run_pipeline(self, n_scenarios, chunk_size=10000, seed=0, output_file='Modem_pipeline.csv',
+                     report_file='Modem_pipeline.pdf', queue_size=2, n_jobs=None, index_keys=None):
+        """Pipeline par paquets : génération → agrégation → écriture → rendu, en parallèle
+        
+        La génération tourne dans un pool de processus, les autres étapes chacune dans
+        son thread ; des files bornées (`queue_size`) relient les étapes, si bien qu'une
+        étape lente freine les précédentes. Les paquets sont identiques à iter_ensemble.
+        
+        index_keys (True ou couples (métrique, année), comme export_excel) : index de
+        scénarios construit par l'étape d'écriture et écrit à côté du CSV (<fichier>.index.npz).
+        """
+        if index_keys is not None and not output_file:
+            raise ValueError("index_keys requiert un fichier de sortie (output_file)")
+        return asyncio.run(self._pipeline(n_scenarios, chunk_size, seed, output_file,
+                                          report_file, queue_size, n_jobs, index_keys))
+    
+    async def _pipeline(self, n_scenarios, chunk_size, seed, output_file, report_file,
+                        queue_size, n_jobs, index_keys):
+        """Orchestration asynchrone des étapes du pipeline"""
+        loop = asyncio.get_running_loop()
+        workers = n_jobs or os.cpu_count()
+        sizes, offsets = self._chunk_layout(n_scenarios, chunk_size)
+        state = {'agregats': None, 'index': []}
+        keys = self._resolve_index_keys(index_keys) if index_keys is not None else None
+        
+        def aggregate(k, chunk):
+            state['agregats'] = self.aggregate_ensemble(chunk, state['agregats'])
+        
+        def write(k, chunk):
+            self._append_chunk_csv(chunk, output_file, offsets[k], header=k == 0)
+            if index_keys is not None:
+                state['index'].append(self.build_scenario_index(chunk, keys))
+        
+        def render(k, chunk):
+            # Figure hors pyplot : sûre dans un thread dédié, libérée après écriture
+            mean = dict(chunk, valeurs=chunk['valeurs'].mean(axis=0, keepdims=True))
+            fig = Figure(figsize=(11.69, 16.54))
+            last = offsets[k] + len(chunk['valeurs']) - 1
+            self._draw_financial_figure(self.ensemble_to_frame(mean), fig,
+                                        f'{self.parti} - moyenne des scénarios {offsets[k]}-{last}')
+            pdf.savefig(fig)
+        
+        steps = [('agregation', aggregate)]
+        if output_file:
+            steps.append(('ecriture', write))
+        if report_file:
+            steps.append(('rendu', render))
+        
+        names = ['generation'] + [name for name, _ in steps]
+        stages = {name: {'paquets': 0, 'scenarios': 0, 'secondes': 0.0} for name in names}
+        queues = [asyncio.Queue(maxsize=queue_size) for _ in steps]
+        
+        async def timed(name, n, pool, func, *args):
+            start = time.perf_counter()
+            result = await loop.run_in_executor(pool, func, *args)
+            stages[name]['secondes'] += time.perf_counter() - start
+            stages[name]['paquets'] += 1
+            stages[name]['scenarios'] += n
+            return result
+        
+        async def generate(processes):
+            # Jusqu'à `workers` paquets en vol, transmis dans l'ordre
+            pending = collections.deque()
+            for k, n in enumerate(sizes):
+                pending.append((k, asyncio.ensure_future(
+                    timed('generation', n, processes, self._generate_chunk, n, seed, k))))
+                if len(pending) >= workers:
+                    k_done, future = pending.popleft()
+                    await queues[0].put((k_done, await future))
+            while pending:
+                k_done, future = pending.popleft()
+                await queues[0].put((k_done, await future))
+            await queues[0].put(None)
+        
+        async def stage(name, work, source, target, pool):
+            while (item := await source.get()) is not None:
+                k, chunk = item
+                await timed(name, len(chunk['valeurs']), pool, work, k, chunk)
+                if target is not None:
+                    await target.put(item)
+            if target is not None:
+                await target.put(None)
+        
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            pdf = stack.enter_context(PdfPages(report_file)) if report_file else None
+            processes = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            threads = [stack.enter_context(ThreadPoolExecutor(max_workers=1)) for _ in steps]
+            
+            tasks = [generate(processes)]
+            for i, (name, work) in enumerate(steps):
+                target = queues[i + 1] if i + 1 < len(queues) else None
+                tasks.append(stage(name, work, queues[i], target, threads[i]))
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        
+        summary = self._aggregates_frame(state['agregats'])
+        if index_keys is not None:
+            self.save_scenario_index(self._merge_scenario_indexes(state['index'], offsets),
+                                     f'{output_file}.index.npz')
+        throughput = pd.DataFrame(stages).T
+        throughput['scenarios_par_seconde'] = throughput['scenarios'] / throughput['secondes']
+        
+        print(f"⚙️ Pipeline terminé: {n_scenarios} scénarios en {elapsed:.1f}s "
+              f"({n_scenarios / elapsed:,.0f} scénarios/s)")
+        for name, row in throughput.iterrows():
+            print(f"• {name}: {row['paquets']:.0f} paquets, {row['secondes']:.1f}s actives, "
+                  f"{row['scenarios_par_seconde']:,.0f} scénarios/s")
+        
+        return {'resume': summary, 'debits': throughput, 'duree': elapsed}
+    
+    def profile_memory(self, n_scenarios=10000, budgets=None, stages=None, top=10, frames=10,
+                       output_file='Modem_profilage.xlsx'):
+        """Profil mémoire des étapes d'un lot : pic par étape, points chauds par méthode
+        
+        budgets : {étape: Mo}. Un dépassement lève MemoryError après le rapport, ce qui
+        fait échouer un banc d'essai. Les méthodes de l'instance sont instrumentées le temps
+        du profilage (pic inclusif par appel) ; les allocations conservées sont regroupées
+        par méthode à partir des instantanés tracemalloc (`frames` niveaux de pile).
+        """
+        budgets = budgets or {}
+        stages = stages or ETAPES_PROFILAGE
+        owners = self._method_lines()
+        calls = {}
+        stack = []
+        
+        def instrument(name, method):
+            def wrapper(*args, **kwargs):
+                current, peak = tracemalloc.get_traced_memory()
+                if stack:
+                    stack[-1]['plus_haut'] = max(stack[-1]['plus_haut'], peak)
+                tracemalloc.reset_peak()
+                stack.append({'entree': current, 'plus_haut': current})
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    frame = stack.pop()
+                    highest = max(frame['plus_haut'], tracemalloc.get_traced_memory()[1])
+                    record = calls.setdefault(name, {'appels': 0, 'pic': 0})
+                    record['appels'] += 1
+                    record['pic'] = max(record['pic'], highest - frame['entree'])
+                    if stack:
+                        # Le pic remonte au cadre appelant (méthode ou étape) avant la remise à zéro
+                        stack[-1]['plus_haut'] = max(stack[-1]['plus_haut'], highest)
+                        stack[-1]['pic_appels'] = max(stack[-1].get('pic_appels', 0),
+                                                      highest - stack[-1]['entree'])
+                    tracemalloc.reset_peak()
+            return wrapper
+        
+        names = [name for name in owners if name != 'profile_memory']
+        for name in names:
+            setattr(self, name, instrument(name, getattr(self, name)))
+        
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(frames)
+        previous_n = self.n_scenarios
+        results = {}
+        retained = {}
+        rows = []
+        
+        actions = {
+            'generation': lambda: self.generate_ensemble(n_scenarios),
+            'indicateurs': lambda: self.derive_indicators(results['generation']),
+            'tresorerie': lambda: self.simulate_liquidity(results['generation']),
+            'conversion': lambda: self.ensemble_to_frame(results['generation']),
+            'insights': lambda: self.compute_insight_statistics(results['generation']),
+            'export': lambda: self.export_excel(results['generation'], output_file),
+        }
         
-        # Générer les insights
-        self._generate_financial_insights(df)
+        try:
+            for stage in stages:
+                before = tracemalloc.take_snapshot()
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                # Cadre de l'étape : les méthodes instrumentées y reportent leurs pics
+                stack.append({'entree': baseline, 'plus_haut': baseline})
+                start = time.perf_counter()
+                try:
+                    results[stage] = actions[stage]()
+                finally:
+                    frame = stack.pop()
+                elapsed = time.perf_counter() - start
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame['plus_haut'])
+                assert peak - baseline >= frame.get('pic_appels', 0), \
+                    f"Pic de l'étape {stage} inférieur au pic d'une méthode appelée"
+                
+                # Allocations conservées, attribuées à la méthode appelante la plus interne
+                after = tracemalloc.take_snapshot()
+                for stat in after.compare_to(before, 'traceback'):
+                    if stat.size_diff > 0:
+                        owner = self._allocation_owner(stat.traceback, owners)
+                        retained[owner] = retained.get(owner, 0) + stat.size_diff
+                
+                rows.append({
+                    'Etape': stage,
+                    'Pic_Mo': (peak - baseline) / 1e6,
+                    'Conserve_Mo': (current - baseline) / 1e6,
+                    'Duree_s': elapsed,
+                    'Budget_Mo': budgets.get(stage, np.nan),
+                })
+        finally:
+            for name in names:
+                delattr(self, name)
+            if started:
+                tracemalloc.stop()
+            self.n_scenarios = previous_n
+        
+        report = pd.DataFrame(rows).set_index('Etape')
+        report['Depassement'] = report['Pic_Mo'] > report['Budget_Mo']
+        methods = pd.DataFrame({
+            'Appels': pd.Series({name: c['appels'] for name, c in calls.items()}, dtype=float),
+            'Pic_Inclusif_Mo': pd.Series({name: c['pic'] / 1e6 for name, c in calls.items()}, dtype=float),
+            'Conserve_Mo': pd.Series({name: size / 1e6 for name, size in retained.items()}, dtype=float),
+        }).fillna(0).sort_values('Pic_Inclusif_Mo', ascending=False)
+        
+        print(f"🧠 PROFIL MÉMOIRE ({n_scenarios} scénarios)")
+        for stage, row in report.iterrows():
+            budget = f" / budget {row['Budget_Mo']:.0f} Mo" if not np.isnan(row['Budget_Mo']) else ""
+            flag = " ❌" if row['Depassement'] else ""
+            print(f"• {stage}: pic {row['Pic_Mo']:.1f} Mo{budget}, conservé {row['Conserve_Mo']:.1f} Mo, "
+                  f"{row['Duree_s']:.2f}s{flag}")
+        print("Points chauds (pic inclusif par appel):")
+        for name, row in methods.head(top).iterrows():
+            print(f"• {name}: {row['Pic_Inclusif_Mo']:.1f} Mo ({row['Appels']:.0f} appels)")
+        
+        exceeded = report.index[report['Depassement']].tolist()
+        if exceeded:
+            raise MemoryError(f"Budget mémoire dépassé pour: {', '.join(exceeded)}")
+        return {'etapes': report, 'methodes': methods}
+    
+    def _method_lines(self):
+        """Plages de lignes (début, fin) de chaque méthode de la classe dans ce fichier"""
+        lines = {}
+        for name, member in vars(type(self)).items():
+            if inspect.isfunction(member):
+                source, first = inspect.getsourcelines(member)
+                lines[name] = (first, first + len(source) - 1)
+        return lines
+    
+    def _allocation_owner(self, traceback, owners):
+        """Méthode de la classe la plus interne dans la pile d'une allocation"""
+        source = inspect.getsourcefile(type(self))
+        for frame in reversed(traceback):
+            if frame.filename == source:
+                for name, (first, last) in owners.items():
+                    if first <= frame.lineno <= last:
+                        return name
+        return '<hors classe>'
     
     def _plot_revenue_expenses(self, df, ax):
         """Plot de l'évolution des revenus et dépenses"""
@@ -954,54 +2787,91 @@ class ModemFinanceAnalyzer:
         lines2, labels2 = ax2.get_legend_handles_labels()
         ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
     
-    def _generate_financial_insights(self, df):
+    def compute_insight_statistics(self, ensemble, scenarios=None, indicators=None):
+        """Calcule les statistiques des insights (moyennes sur tous les scénarios ou une sélection)
+        
+        indicators : noms d'indicateurs dérivés à ajouter (moyenne sur scénarios et années).
+        """
+        if scenarios is not None:
+            ensemble = self.select_scenarios(ensemble, scenarios)
+        stats = self.insights_from_aggregates(self.aggregate_ensemble(ensemble))
+        
+        if indicators:
+            derived = self.derive_indicators(ensemble, indicators)
+            for k, name in enumerate(indicators):
+                scale = 100 if self.indicator_label(name)[1] == "%" else 1
+                stats[name] = np.nanmean(derived['valeurs'][:, :, k]) * scale
+        return stats
+    
+    def insights_from_aggregates(self, aggregates, indicators=None):
+        """Statistiques des insights à partir des seuls agrégats matérialisés
+        
+        indicators : indicateurs dérivés à ajouter, évalués sur la trajectoire moyenne
+        (les agrégats ne conservent pas les scénarios).
+        """
+        mean = aggregates['moyenne']
+        position = {m: j for j, m in enumerate(aggregates['metriques'])}
+        def average(metric):
+            return mean[:, position[metric]].mean()
+        revenue = average('Revenus_Total')
+        
+        stats = {
+            'revenus_moyens': revenue,
+            'depenses_moyennes': average('Depenses_Total'),
+            'adherents_moyens': average('Adherents'),
+            'taux_execution_moyen': average('Taux_Execution_Budget') * 100,
+            'evolution_revenus': aggregates['evolution'][position['Revenus_Total']] * 100,
+            'evolution_adherents': aggregates['evolution'][position['Adherents']] * 100,
+            'part_cotisations': average('Cotisations_Adherents') / revenue * 100,
+            'part_dons': average('Dons_Prives') / revenue * 100,
+            'part_financement_public': average('Financement_Public') / revenue * 100,
+            'part_financement_europeen': average('Financement_Europeen') / revenue * 100,
+            'solde_moyen': average('Solde_Financier') * 100,
+            'reserves_finales': mean[-1, position['Reserves_Financieres']],
+            'dependance_financement_public': mean[-1, position['Dependance_Financement_Public']] * 100,
+        }
+        
+        if indicators:
+            trajectory = {'annees': aggregates['annees'], 'metriques': aggregates['metriques'],
+                          'valeurs': mean[None], 'log_poids': np.zeros(1), 'innovations': {}}
+            derived = self.derive_indicators(trajectory, indicators)
+            for k, name in enumerate(indicators):
+                scale = 100 if self.indicator_label(name)[1] == "%" else 1
+                stats[name] = np.nanmean(derived['valeurs'][:, :, k]) * scale
+        return stats
+    
+    def _generate_financial_insights(self, df, stats=None, indicators=None):
         """Génère des insights analytiques pour le MoDem"""
         print(f"🏛️ INSIGHTS ANALYTIQUES - {self.parti} ({self.start_year}-{self.end_year})")
         print("=" * 70)
         
+        if stats is None:
+            stats = self.compute_insight_statistics(self.frame_to_ensemble(df), indicators=indicators)
+        
         # 1. Statistiques de base
         print("\n1. 📈 STATISTIQUES GÉNÉRALES:")
-        avg_revenue = df['Revenus_Total'].mean()
-        avg_expenses = df['Depenses_Total'].mean()
-        avg_adherents = df['Adherents'].mean()
-        avg_execution = df['Taux_Execution_Budget'].mean() * 100
-        
-        print(f"Revenus moyens annuels: {avg_revenue:.2f} M€")
-        print(f"Dépenses moyennes annuelles: {avg_expenses:.2f} M€")
-        print(f"Adhérents moyens: {avg_adherents:,.0f} personnes")
-        print(f"Taux d'exécution budgétaire moyen: {avg_execution:.1f}%")
+        print(f"Revenus moyens annuels: {stats['revenus_moyens']:.2f} M€")
+        print(f"Dépenses moyennes annuelles: {stats['depenses_moyennes']:.2f} M€")
+        print(f"Adhérents moyens: {stats['adherents_moyens']:,.0f} personnes")
+        print(f"Taux d'exécution budgétaire moyen: {stats['taux_execution_moyen']:.1f}%")
         
         # 2. Croissance historique
         print("\n2. 📊 ÉVOLUTION HISTORIQUE:")
-        revenue_growth = ((df['Revenus_Total'].iloc[-1] / 
-                          df['Revenus_Total'].iloc[0]) - 1) * 100
-        adherents_growth = ((df['Adherents'].iloc[-1] / 
-                           df['Adherents'].iloc[0]) - 1) * 100
-        
-        print(f"Évolution des revenus ({self.start_year}-{self.end_year}): {revenue_growth:.1f}%")
-        print(f"Évolution des adhérents ({self.start_year}-{self.end_year}): {adherents_growth:.1f}%")
+        print(f"Évolution des revenus ({self.start_year}-{self.end_year}): {stats['evolution_revenus']:.1f}%")
+        print(f"Évolution des adhérents ({self.start_year}-{self.end_year}): {stats['evolution_adherents']:.1f}%")
         
         # 3. Structure financière
         print("\n3. 📋 STRUCTURE FINANCIÈRE:")
-        membership_share = (df['Cotisations_Adherents'].mean() / df['Revenus_Total'].mean()) * 100
-        donations_share = (df['Dons_Prives'].mean() / df['Revenus_Total'].mean()) * 100
-        public_funding_share = (df['Financement_Public'].mean() / df['Revenus_Total'].mean()) * 100
-        european_funding_share = (df['Financement_Europeen'].mean() / df['Revenus_Total'].mean()) * 100
-        
-        print(f"Part des cotisations dans les revenus: {membership_share:.1f}%")
-        print(f"Part des dons privés: {donations_share:.1f}%")
-        print(f"Part du financement public: {public_funding_share:.1f}%")
-        print(f"Part du financement européen: {european_funding_share:.1f}%")
+        print(f"Part des cotisations dans les revenus: {stats['part_cotisations']:.1f}%")
+        print(f"Part des dons privés: {stats['part_dons']:.1f}%")
+        print(f"Part du financement public: {stats['part_financement_public']:.1f}%")
+        print(f"Part du financement européen: {stats['part_financement_europeen']:.1f}%")
         
         # 4. Performance et efficacité
         print("\n4. 🎯 PERFORMANCE FINANCIÈRE:")
-        avg_balance = df['Solde_Financier'].mean() * 100
-        last_reserves = df['Reserves_Financieres'].iloc[-1]
-        dependency_public = df['Dependance_Financement_Public'].iloc[-1] * 100
-        
-        print(f"Solde financier moyen: {avg_balance:.1f}% du budget")
-        print(f"Réserves financières finales: {last_reserves:.1f} M€")
-        print(f"Dépendance au financement public: {dependency_public:.1f}%")
+        print(f"Solde financier moyen: {stats['solde_moyen']:.1f}% du budget")
+        print(f"Réserves financières finales: {stats['reserves_finales']:.1f} M€")
+        print(f"Dépendance au financement public: {stats['dependance_financement_public']:.1f}%")
         
         # 5. Spécificités du MoDem
         print(f"\n5. 🌟 SPÉCIFICITÉS DU MOUVEMENT DÉMOCRATE:")
@@ -1031,6 +2901,14 @@ class ModemFinanceAnalyzer:
         print("• Renforcer l'ancrage local et territorial")
         print("• Développer les think tanks et la prospective")
         print("• Préparer les futures alliances électorales")
+        
+        # 8. Indicateurs dérivés choisis
+        derived = [key for key in stats if key not in LIBELLES_INSIGHTS]
+        if derived:
+            print("\n8. 🧮 INDICATEURS DÉRIVÉS:")
+            for key in derived:
+                label, unit = self.indicator_label(key)
+                print(f"{label}: {stats[key]:,.2f} {unit}")
 
 def main():
     """Fonction principale pour l'analyse du MoDem"""
@@ -1047,6 +2925,8 @@ def main():
     output_file = 'Modem_financial_data_2007_2025.csv'
     financial_data.to_csv(output_file, index=False)
     print(f"💾 Données sauvegardées: {output_file}")
+    analyzer.export_excel(analyzer.frame_to_ensemble(financial_data),
+                          'Modem_financial_data_2007_2025.xlsx')
     
     # Aperçu des données
     print("\n👀 Aperçu des données:")